@@ -25,7 +25,7 @@ from playwright.async_api import async_playwright
 # Import utility modules
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from utils.browser_utils import setup_browser, handle_consent_dialog
+from utils.browser_utils import setup_browser, handle_consent_dialog, CLEAR_ANT_MODALS_JS
 from utils.data_utils import save_json_data
 from utils.supabase_utils import save_pool_stats
 
@@ -35,11 +35,7 @@ async def extract_dashboard_stats(page, output_dir, observer_user_id, coin_type)
     
     # Ensure no modals are present
     print("Ensuring no modals are present...")
-    await page.evaluate("""() => {
-        document.querySelectorAll('.ant-modal-close').forEach(el => el.click());
-        document.querySelectorAll('.ant-modal-mask').forEach(el => el.remove());
-        document.querySelectorAll('.ant-modal-wrap').forEach(el => el.remove());
-    }""")
+    await page.evaluate(CLEAR_ANT_MODALS_JS)
     print("Removed any modal elements")
     
     # Extract hashrate data
@@ -8,78 +8,123 @@ stored in Supabase.
 
 import os
 import sys
-import json
+import logging
 import argparse
 import asyncio
+import time
 from datetime import datetime
-import traceback
 from pathlib import Path
 
+import orjson
+from playwright.async_api import async_playwright
+
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    from utils.browser_utils import setup_browser, handle_cookie_consent, take_screenshot
+    from utils.browser_utils import launch_browser, handle_cookie_consent, block_heavy_resources, CONSENT_STATE_FILE, consent_state_is_fresh, save_consent_state
     from utils.data_utils import save_json_to_file, format_timestamp
-    from utils.supabase_utils import get_supabase_client
+    from utils.logging_utils import setup_logging
+    from utils.supabase_utils import get_supabase_client, insert_in_batches, update_last_scraped
 except ImportError:
     # Fallback for direct script execution
     sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-    from utils.browser_utils import setup_browser, handle_cookie_consent, take_screenshot
+    from utils.browser_utils import launch_browser, handle_cookie_consent, block_heavy_resources, CONSENT_STATE_FILE, consent_state_is_fresh, save_consent_state
     from utils.data_utils import save_json_to_file, format_timestamp
-    from utils.supabase_utils import get_supabase_client
+    from utils.logging_utils import setup_logging
+    from utils.supabase_utils import get_supabase_client, insert_in_batches, update_last_scraped
+
+logger = logging.getLogger(__name__)
+
+# Directory for --debug table HTML and row dumps
+DEBUG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "debug")
+
+# Active accounts fetched from Supabase are cached in the user's cache directory
+# (never the output directory, since they hold access keys) for this many seconds,
+# so back-to-back runs skip the account query
+ACCOUNTS_CACHE_FILE = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "antpool_accounts.json"
+)
+ACCOUNTS_CACHE_MAX_AGE = 300
+
+# Only the account columns process_account reads are cached
+ACCOUNT_COLUMNS = ("account_name", "access_key", "user_id", "coin_type")
+
+def load_cached_accounts(cache_path, max_age):
+    """Return the cached account list if it is younger than max_age seconds, else None."""
+    try:
+        if time.time() - os.path.getmtime(cache_path) >= max_age:
+            return None
+        return orjson.loads(Path(cache_path).read_bytes())
+    except (OSError, ValueError):
+        return None
 
-async def scrape_earnings(page, access_key, user_id, coin_type, debug=False):
-    """Scrape earnings history from Antpool."""
-    print(f"Scraping earnings for {user_id} ({coin_type})...")
+def save_cached_accounts(cache_path, accounts):
+    """Cache the account list, readable only by the current user since it holds access keys."""
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        cached = [{column: account.get(column) for column in ACCOUNT_COLUMNS} for account in accounts]
+        with open(os.open(cache_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as f:
+            f.write(orjson.dumps(cached))
+    except OSError as e:
+        logger.warning(f"Error caching accounts: {e}")
+
+async def scrape_earnings(page, access_key, user_id, coin_type, debug=False, handle_consent=True):
+    """Scrape earnings history from Antpool.
+    
+    handle_consent is False when the page's context was seeded with a saved consent state.
+    """
+    logger.info(f"Scraping earnings for {user_id} ({coin_type})...")
     
     # Navigate to observer page
     observer_url = f"https://www.antpool.com/observer?accessKey={access_key}&coinType={coin_type}&observerUserId={user_id}"
-    await page.goto(observer_url, wait_until="networkidle")
-    print(f"Navigated to observer page for {user_id}")
+    await page.goto(observer_url, wait_until="domcontentloaded")
+    logger.info(f"Navigated to observer page for {user_id}")
     
     # Handle cookie consent if needed
-    await handle_cookie_consent(page)
+    if handle_consent:
+        await handle_cookie_consent(page)
     
     # Navigate to earnings page
     await page.click('text="Earnings"')
-    print("Navigated to earnings page")
+    logger.info("Navigated to earnings page")
     
     # Wait for earnings table to load
     await page.wait_for_selector(".ant-table-wrapper", timeout=30000)
-    print("Earnings table loaded")
+    logger.info("Earnings table loaded")
     
     # Extract earnings data
     earnings_data = []
     
     try:
-        # Get table rows
-        rows = await page.query_selector_all(".ant-table-tbody tr")
-        print(f"Found {len(rows)} earnings rows")
+        # Get the cell texts of every table row in a single call, without row handles
+        rows = await page.locator(".ant-table-tbody tr").evaluate_all(
+            "rows => rows.map(row => [...row.querySelectorAll('td')].map(cell => cell.innerText))"
+        )
+        logger.info(f"Found {len(rows)} earnings rows")
         
         # Debug: Save table HTML if requested
         if debug:
             table_html = await page.evaluate('() => document.querySelector(".ant-table-wrapper").outerHTML')
-            with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "debug", "earnings_table_html.html"), "w") as f:
+            with open(os.path.join(DEBUG_DIR, f"earnings_table_html_{user_id}.html"), "w") as f:
                 f.write(table_html)
-            print("Saved earnings table HTML for debugging")
+            logger.info("Saved earnings table HTML for debugging")
+        
+        # One timestamp for the whole scrape, shared by every earnings row
+        timestamp = format_timestamp()
         
         # Process each row
-        for row_idx, row in enumerate(rows):
+        for row_idx, cells in enumerate(rows):
             try:
-                # Extract cells
-                cells = await row.query_selector_all("td")
-                
                 if len(cells) < 5:
-                    print(f"Skipping row {row_idx+1}: Not enough cells ({len(cells)})")
+                    logger.warning(f"Skipping row {row_idx+1}: Not enough cells ({len(cells)})")
                     continue
                 
                 # Extract data from cells
-                date = await cells[0].inner_text() if len(cells) > 0 else ""
-                daily_hashrate = await cells[1].inner_text() if len(cells) > 1 else ""
+                date, daily_hashrate, earnings_text, earnings_type, payment_status = cells[:5]
                 
                 # Extract earnings amount and currency
-                earnings_text = await cells[2].inner_text() if len(cells) > 2 else ""
                 earnings_parts = earnings_text.strip().split(" ")
                 if len(earnings_parts) >= 2:
                     earnings_amount = earnings_parts[0]
@@ -88,9 +133,6 @@ async def scrape_earnings(page, access_key, user_id, coin_type, debug=False):
                     earnings_amount = earnings_text
                     earnings_currency = ""
                 
-                earnings_type = await cells[3].inner_text() if len(cells) > 3 else ""
-                payment_status = await cells[4].inner_text() if len(cells) > 4 else ""
-                
                 # Create earnings data dictionary
                 earning_data = {
                     "date": date,
@@ -99,62 +141,82 @@ async def scrape_earnings(page, access_key, user_id, coin_type, debug=False):
                     "earnings_currency": earnings_currency,
                     "earnings_type": earnings_type,
                     "payment_status": payment_status,
-                    "timestamp": format_timestamp(),
+                    "timestamp": timestamp,
                     "observer_user_id": user_id,
                     "coin_type": coin_type
                 }
                 
                 earnings_data.append(earning_data)
-                print(f"Extracted earnings for {date}")
+                logger.debug(f"Extracted earnings for {date}")
                 
             except Exception as e:
-                print(f"Error extracting earnings row {row_idx+1}: {e}")
-                traceback.print_exc()
+                logger.exception(f"Error extracting earnings row {row_idx+1}: {e}")
         
         # Debug: Save earnings rows if requested
         if debug:
-            with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "debug", "earnings_rows_debug.json"), "w") as f:
-                json.dump(earnings_data, f, indent=2)
-            print("Saved earnings rows for debugging")
+            with open(os.path.join(DEBUG_DIR, f"earnings_rows_debug_{user_id}.json"), "wb") as f:
+                f.write(orjson.dumps(earnings_data, option=orjson.OPT_INDENT_2))
+            logger.info("Saved earnings rows for debugging")
         
     except Exception as e:
-        print(f"Error extracting earnings: {e}")
-        traceback.print_exc()
+        logger.exception(f"Error extracting earnings: {e}")
     
-    print(f"Extracted {len(earnings_data)} earnings entries for {user_id}")
+    logger.info(f"Extracted {len(earnings_data)} earnings entries for {user_id}")
     return earnings_data
 
 async def take_earnings_screenshot(page, output_dir, user_id, timestamp_str):
-    """Take a screenshot of the earnings page."""
+    """Take a JPEG screenshot of the earnings table."""
     try:
         # Wait for earnings table to be visible
-        await page.wait_for_selector(".ant-table-wrapper", timeout=10000)
+        table = await page.wait_for_selector(".ant-table-wrapper", timeout=10000)
         
-        # Take screenshot
-        screenshot_path = os.path.join(output_dir, f"{timestamp_str}_Antpool_BTC_earnings.png")
-        await take_screenshot(page, screenshot_path)
-        print(f"Saved earnings screenshot to {screenshot_path}")
+        # Capture only the table, as a JPEG which is much smaller than a full-page PNG
+        screenshot_path = os.path.join(output_dir, f"{timestamp_str}_Antpool_BTC_earnings_{user_id}.jpg")
+        await table.screenshot(path=screenshot_path, type="jpeg", quality=70)
+        logger.info(f"Saved earnings screenshot to {screenshot_path}")
         return screenshot_path
     except Exception as e:
-        print(f"Error taking earnings screenshot: {e}")
-        traceback.print_exc()
+        logger.exception(f"Error taking earnings screenshot: {e}")
         return None
 
-async def save_to_supabase(supabase, earnings_data):
-    """Save earnings data to Supabase."""
+def save_to_supabase(supabase, earnings_data, user_ids):
+    """Save earnings data to Supabase, then mark the accounts whose rows were all saved.
+    
+    Rows are inserted in batches, with a row-by-row retry for a failed batch.
+    """
+    failed_rows = insert_in_batches(supabase, "mining_earnings", earnings_data) if earnings_data else []
+    unsaved_user_ids = {row.get("observer_user_id") for row in failed_rows}
+    saved_user_ids = [user_id for user_id in user_ids if user_id not in unsaved_user_ids]
+    if saved_user_ids:
+        update_last_scraped(supabase, saved_user_ids)
+
+async def warm_up_consent_state(browser, account):
+    """Accept the consent dialogs once on an observer page and save the consent state.
+    
+    Runs before accounts are scraped concurrently, so a single context writes the
+    state file and every account's context is seeded from the finished file.
+    """
+    context = await browser.new_context()
     try:
-        # Insert data into mining_earnings table
-        for earning in earnings_data:
-            result = supabase.table("mining_earnings").insert(earning).execute()
-            print(f"Saved earnings for {earning['date']} to Supabase")
-        return True
+        await block_heavy_resources(context)
+        page = await context.new_page()
+        observer_url = f"https://www.antpool.com/observer?accessKey={account['access_key']}&coinType={account.get('coin_type', 'BTC')}&observerUserId={account['user_id']}"
+        await page.goto(observer_url, wait_until="domcontentloaded")
+        await handle_cookie_consent(page)
+        await save_consent_state(context, page, CONSENT_STATE_FILE)
     except Exception as e:
-        print(f"Error saving to Supabase: {e}")
-        traceback.print_exc()
-        return False
+        logger.warning(f"Could not save consent state: {e}")
+    finally:
+        await context.close()
 
-async def process_account(browser, output_dir, supabase, account, debug=False):
-    """Process a single account."""
+async def process_account(browser, output_dir, account, debug=False):
+    """Process a single account.
+    
+    Only scrapes and writes local files; Supabase writes are batched by main_async.
+    The account's context is seeded from the consent state saved by
+    warm_up_consent_state when it is fresh, otherwise consent is handled on the page.
+    Returns the scraped earnings, or None if the account failed.
+    """
     try:
         # Extract account details
         account_name = account.get("account_name", "Unknown")
@@ -162,15 +224,18 @@ async def process_account(browser, output_dir, supabase, account, debug=False):
         user_id = account.get("user_id", "")
         coin_type = account.get("coin_type", "BTC")
         
-        print(f"Processing account: {account_name} ({user_id})")
+        logger.info(f"Processing account: {account_name} ({user_id})")
         
         # Skip if missing required fields
         if not access_key or not user_id:
-            print(f"Skipping account {account_name}: Missing required fields")
-            return False
+            logger.warning(f"Skipping account {account_name}: Missing required fields")
+            return None
         
-        # Create a new page for this account
-        page = await browser.new_page()
+        # Create a new context and page for this account, reusing saved consent state
+        storage_state = CONSENT_STATE_FILE if consent_state_is_fresh(CONSENT_STATE_FILE) else None
+        context = await browser.new_context(storage_state=storage_state)
+        await block_heavy_resources(context)
+        page = await context.new_page()
         
         try:
             # Get current timestamp for filenames
@@ -178,64 +243,54 @@ async def process_account(browser, output_dir, supabase, account, debug=False):
             timestamp_str = timestamp.strftime("%Y%m%d_%H%M")
             
             # Scrape earnings
-            earnings_data = await scrape_earnings(page, access_key, user_id, coin_type, debug)
+            earnings_data = await scrape_earnings(
+                page, access_key, user_id, coin_type, debug,
+                handle_consent=storage_state is None
+            )
             
             # Take screenshot
             screenshot_path = await take_earnings_screenshot(page, output_dir, user_id, timestamp_str)
             
             # Save to file
             json_path = os.path.join(output_dir, f"earnings_history_{user_id}_{timestamp_str}.json")
-            save_json_to_file(earnings_data, json_path)
-            print(f"Saved earnings data to {json_path}")
-            
-            # Save to Supabase
-            if supabase and earnings_data:
-                await save_to_supabase(supabase, earnings_data)
+            await asyncio.to_thread(save_json_to_file, earnings_data, json_path)
+            logger.info(f"Saved earnings data to {json_path}")
             
-            # Update last_scraped_at in account_credentials
-            if supabase:
-                try:
-                    supabase.table("account_credentials").update({"last_scraped_at": format_timestamp()}).eq("user_id", user_id).execute()
-                except Exception as e:
-                    print(f"Error updating last_scraped_at: {e}")
-            
-            print(f"Successfully processed account: {account_name}")
-            return True
+            logger.info(f"Successfully processed account: {account_name}")
+            return earnings_data
             
         finally:
-            # Close the page
-            await page.close()
+            # Close the context and its page
+            await context.close()
             
     except Exception as e:
-        print(f"Error processing account {account.get('account_name', 'Unknown')}: {e}")
-        traceback.print_exc()
-        return False
+        logger.exception(f"Error processing account {account.get('account_name', 'Unknown')}: {e}")
+        return None
 
 async def fetch_accounts_from_supabase(supabase):
     """Fetch accounts from Supabase."""
     try:
         # First try using the RPC function
         try:
-            print("Attempting to fetch accounts using RPC function...")
+            logger.info("Attempting to fetch accounts using RPC function...")
             response = supabase.rpc('get_all_active_accounts').execute()
             accounts = response.data
             if accounts:
-                print(f"Successfully fetched {len(accounts)} accounts using RPC function")
+                logger.info(f"Successfully fetched {len(accounts)} accounts using RPC function")
                 return accounts
         except Exception as rpc_error:
-            print(f"Error fetching accounts using RPC function: {rpc_error}")
+            logger.warning(f"Error fetching accounts using RPC function: {rpc_error}")
             # Continue to fallback method
         
         # Fallback: direct query
-        print("Falling back to direct query...")
+        logger.info("Falling back to direct query...")
         response = supabase.table("account_credentials").select("*").eq("is_active", True).order("priority.desc,last_scraped_at.asc.nullsfirst").execute()
         accounts = response.data
-        print(f"Successfully fetched {len(accounts)} accounts using direct query")
+        logger.info(f"Successfully fetched {len(accounts)} accounts using direct query")
         return accounts
         
     except Exception as e:
-        print(f"Error fetching accounts from Supabase: {e}")
-        traceback.print_exc()
+        logger.exception(f"Error fetching accounts from Supabase: {e}")
         return []
 
 async def main_async(args):
@@ -245,7 +300,7 @@ async def main_async(args):
     
     # Create debug directory if needed
     if args.debug:
-        os.makedirs(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "debug"), exist_ok=True)
+        os.makedirs(DEBUG_DIR, exist_ok=True)
     
     # Initialize Supabase client
     supabase = None
@@ -263,26 +318,66 @@ async def main_async(args):
             "coin_type": args.coin_type
         }]
     elif supabase:
-        # Fetch accounts from Supabase
-        accounts = await fetch_accounts_from_supabase(supabase)
+        # Reuse a recent account list, otherwise fetch accounts from Supabase
+        accounts = load_cached_accounts(ACCOUNTS_CACHE_FILE, args.accounts_cache_ttl)
+        if accounts:
+            logger.info(f"Using {len(accounts)} cached accounts from {ACCOUNTS_CACHE_FILE}")
+        else:
+            accounts = await fetch_accounts_from_supabase(supabase)
+            if accounts and args.accounts_cache_ttl > 0:
+                save_cached_accounts(ACCOUNTS_CACHE_FILE, accounts)
+    
+    # Drop accounts that can't be scraped before paying for a browser launch
+    skipped = [a for a in accounts if not (a.get("access_key") and a.get("user_id"))]
+    if skipped:
+        logger.warning(f"Skipping {len(skipped)} accounts missing access_key or user_id")
+        accounts = [a for a in accounts if a.get("access_key") and a.get("user_id")]
     
     if not accounts:
-        print("No accounts to scrape. Exiting.")
+        logger.info("No accounts to scrape. Exiting.")
         return 1
     
-    print(f"Found {len(accounts)} accounts to scrape")
+    logger.info(f"Found {len(accounts)} accounts to scrape")
+    
+    # Process accounts concurrently in one browser, at most args.concurrency at a time
+    semaphore = asyncio.Semaphore(args.concurrency)
+    
+    async def run_account(browser, account):
+        async with semaphore:
+            return await process_account(browser, args.output_dir, account, args.debug)
     
     # Initialize browser
-    async with await setup_browser() as browser:
-        # Process each account
-        results = []
-        for account in accounts:
-            result = await process_account(browser, args.output_dir, supabase, account, args.debug)
-            results.append(result)
+    async with async_playwright() as playwright:
+        browser = await launch_browser(playwright)
+        
+        try:
+            # Save the consent state once, before the concurrent accounts read it
+            if not consent_state_is_fresh(CONSENT_STATE_FILE):
+                await warm_up_consent_state(browser, accounts[0])
+            
+            results = await asyncio.gather(
+                *(run_account(browser, account) for account in accounts),
+                return_exceptions=True
+            )
+        finally:
+            await browser.close()
+        
+        for account, result in zip(accounts, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error processing account {account['user_id']}: {result}", exc_info=result)
+        
+        # Save all accounts' earnings to Supabase in batches, off the event loop,
+        # then mark the accounts whose earnings were all saved in one update
+        succeeded = [(account, r) for account, r in zip(accounts, results) if isinstance(r, list)]
+        all_earnings = [earning for _, r in succeeded for earning in r]
+        if supabase and succeeded:
+            await asyncio.to_thread(
+                save_to_supabase, supabase, all_earnings, [account["user_id"] for account, _ in succeeded]
+            )
         
         # Print summary
-        success_count = sum(1 for r in results if r)
-        print(f"Processed {len(accounts)} accounts: {success_count} succeeded, {len(accounts) - success_count} failed")
+        success_count = len(succeeded)
+        logger.info(f"Processed {len(accounts)} accounts: {success_count} succeeded, {len(accounts) - success_count} failed")
     
     return 0
 
@@ -295,16 +390,20 @@ def main():
     parser.add_argument("--output_dir", default="./output", help="Output directory for JSON and screenshots")
     parser.add_argument("--skip_supabase", action="store_true", help="Skip Supabase integration")
     parser.add_argument("--debug", action="store_true", help="Enable debug mode")
+    parser.add_argument("--concurrency", type=int, default=int(os.environ.get("SCRAPE_CONCURRENCY", 4)), help="Accounts to scrape at once (default: SCRAPE_CONCURRENCY or 4)")
+    parser.add_argument("--accounts_cache_ttl", type=int, default=ACCOUNTS_CACHE_MAX_AGE, help=f"Seconds to reuse the cached Supabase account list (0 to disable, default: {ACCOUNTS_CACHE_MAX_AGE})")
     
     args = parser.parse_args()
+    listener = setup_logging(args.debug)
     
     # Run async main
     try:
         return asyncio.run(main_async(args))
     except Exception as e:
-        print(f"Error in main: {e}")
-        traceback.print_exc()
+        logger.exception(f"Error in main: {e}")
         return 1
+    finally:
+        listener.stop()
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -8,112 +8,138 @@ stored in Supabase.
 
 import os
 import sys
-import json
+import logging
 import argparse
 import asyncio
 from datetime import datetime
-import traceback
 from pathlib import Path
 
+import orjson
+from playwright.async_api import async_playwright
+
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    from utils.browser_utils import setup_browser, handle_cookie_consent, take_screenshot
-    from utils.data_utils import save_json_to_file, format_timestamp
-    from utils.supabase_utils import get_supabase_client
+    from utils.browser_utils import launch_browser, uses_browser_daemon, handle_cookie_consent, take_screenshot, block_heavy_resources, CONSENT_STATE_FILE, consent_state_is_fresh, save_consent_state
+    from utils.data_utils import save_json_to_file, save_ndjson_gz, format_timestamp
+    from utils.logging_utils import setup_logging
+    from utils.supabase_utils import get_supabase_client, insert_in_batches, update_last_scraped
 except ImportError:
     # Fallback for direct script execution
     sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-    from utils.browser_utils import setup_browser, handle_cookie_consent, take_screenshot
-    from utils.data_utils import save_json_to_file, format_timestamp
-    from utils.supabase_utils import get_supabase_client
+    from utils.browser_utils import launch_browser, uses_browser_daemon, handle_cookie_consent, take_screenshot, block_heavy_resources, CONSENT_STATE_FILE, consent_state_is_fresh, save_consent_state
+    from utils.data_utils import save_json_to_file, save_ndjson_gz, format_timestamp
+    from utils.logging_utils import setup_logging
+    from utils.supabase_utils import get_supabase_client, insert_in_batches, update_last_scraped
+
+logger = logging.getLogger(__name__)
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEBUG_DIR = SCRIPT_DIR.parent / "debug"
+
+# Only the account_credentials columns process_account reads
+ACCOUNT_COLUMNS = "account_name,access_key,user_id,coin_type"
 
-async def scrape_inactive_workers(page, access_key, user_id, coin_type, debug=False):
-    """Scrape inactive worker statistics from Antpool."""
-    print(f"Scraping inactive workers for {user_id} ({coin_type})...")
+# Observer page selectors, shared by every account
+WORKERS_TAB = 'text="Workers"'
+INACTIVE_TAB = 'text="Inactive Workers"'
+TABS_SELECTOR = ".ant-tabs-tab"
+TABLE_SELECTOR = ".ant-table-wrapper"
+ROW_SELECTOR = ".ant-table-tbody tr"
+
+# Maps every table row to its cell texts in one round-trip. textContent avoids a
+# layout flush per cell; innerText is kept only for a worker cell without a link,
+# whose raw text can include the hidden "Click to view" tooltip
+EXTRACT_ROWS_JS = """rows => rows.map(row => {
+    const cells = row.querySelectorAll('td');
+    const text = i => cells[i] ? cells[i].textContent.trim() : '';
+    const link = cells[2] ? cells[2].querySelector('a') : null;
+    return {
+        cell_count: cells.length,
+        worker: (link ? link.textContent.trim() : (cells[2] ? cells[2].innerText.trim() : '')) || '',
+        last_share_time: text(3),
+        inactive_time: text(4),
+        h24_hashrate: text(5),
+        rejection_rate: text(6)
+    };
+})"""
+
+async def scrape_inactive_workers(page, access_key, user_id, coin_type, debug=False, dump_html=False, handle_consent=True):
+    """Scrape inactive worker statistics from Antpool.
+    
+    The inactive table HTML is only written when dump_html is set, so a debug run
+    saves one sample rather than one per account. handle_consent is False when the
+    page's context was seeded with a saved consent state.
+    """
+    logger.info(f"Scraping inactive workers for {user_id} ({coin_type})...")
     
     # Navigate to observer page
     observer_url = f"https://www.antpool.com/observer?accessKey={access_key}&coinType={coin_type}&observerUserId={user_id}"
-    await page.goto(observer_url, wait_until="networkidle")
-    print(f"Navigated to observer page for {user_id}")
+    # Return once the response starts; the locator clicks below auto-wait for the tabs
+    await page.goto(observer_url, wait_until="commit", timeout=30000)
+    logger.info(f"Navigated to observer page for {user_id}")
     
     # Handle cookie consent if needed
-    await handle_cookie_consent(page)
+    if handle_consent:
+        await handle_cookie_consent(page)
     
-    # Navigate to workers page
-    await page.click('text="Workers"')
-    print("Navigated to workers page")
+    # Navigate to workers page (locator click auto-waits for the tab to render)
+    await page.locator(WORKERS_TAB).click()
+    logger.info("Navigated to workers page")
     
     # Click on inactive workers tab
     try:
-        await page.click('text="Inactive Workers"')
-        print("Navigated to inactive workers tab")
+        await page.locator(INACTIVE_TAB).click()
+        logger.info("Navigated to inactive workers tab")
     except Exception as e:
-        print(f"Error clicking inactive workers tab: {e}")
-        print("Trying alternative method to access inactive workers")
+        logger.warning(f"Error clicking inactive workers tab: {e}")
+        logger.info("Trying alternative method to access inactive workers")
         
         # Try alternative method - look for tab elements
-        tabs = await page.query_selector_all(".ant-tabs-tab")
+        tabs = await page.query_selector_all(TABS_SELECTOR)
         for tab in tabs:
             tab_text = await tab.inner_text()
             if "inactive" in tab_text.lower():
                 await tab.click()
-                print("Found and clicked inactive workers tab")
+                logger.info("Found and clicked inactive workers tab")
                 break
     
     # Wait for inactive workers table to load
-    await page.wait_for_selector(".ant-table-wrapper", timeout=30000)
-    print("Inactive workers table loaded")
+    await page.wait_for_selector(TABLE_SELECTOR, timeout=30000)
+    logger.info("Inactive workers table loaded")
     
     # Extract inactive worker data
     inactive_workers_data = []
     
     try:
-        # Get table rows
-        rows = await page.query_selector_all(".ant-table-tbody tr")
-        print(f"Found {len(rows)} inactive worker rows")
+        # Read every row's cells in a single evaluate_all call
+        rows = await page.locator(ROW_SELECTOR).evaluate_all(EXTRACT_ROWS_JS)
+        logger.info(f"Found {len(rows)} inactive worker rows")
         
         # Debug: Save table HTML if requested
-        if debug:
-            table_html = await page.evaluate('() => document.querySelector(".ant-table-wrapper").outerHTML')
-            with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "debug", "inactive_table_html.html"), "w") as f:
+        if dump_html:
+            table_html = await page.inner_html(TABLE_SELECTOR)
+            with open(DEBUG_DIR / "inactive_table_html.html", "w") as f:
                 f.write(table_html)
-            print("Saved inactive table HTML for debugging")
+            logger.info("Saved inactive table HTML for debugging")
         
         # Process each row
         for row_idx, row in enumerate(rows):
             try:
-                # Extract cells
-                cells = await row.query_selector_all("td")
-                
-                if len(cells) < 5:
-                    print(f"Skipping row {row_idx+1}: Not enough cells ({len(cells)})")
+                if row["cell_count"] < 5:
+                    logger.debug("Skipping row %d: Not enough cells (%d)", row_idx + 1, row["cell_count"])
                     continue
                 
-                # Extract worker name (in the third column, index 2)
-                worker_cell = cells[2]
-                worker_name_element = await worker_cell.query_selector("a")
-                
-                if worker_name_element:
-                    worker_name = await worker_name_element.inner_text()
-                else:
-                    # Fallback to cell text if no link is found
-                    worker_name = await worker_cell.inner_text()
-                
-                # Extract other metrics
-                last_share_time = await cells[3].inner_text() if len(cells) > 3 else ""
-                inactive_time = await cells[4].inner_text() if len(cells) > 4 else ""
-                h24_hashrate = await cells[5].inner_text() if len(cells) > 5 else ""
-                rejection_rate = await cells[6].inner_text() if len(cells) > 6 else ""
+                worker_name = row["worker"]
                 
                 # Create inactive worker data dictionary
                 inactive_worker_data = {
                     "worker": worker_name,
-                    "last_share_time": last_share_time,
-                    "inactive_time": inactive_time,
-                    "h24_hashrate": h24_hashrate,
-                    "rejection_rate": rejection_rate,
+                    "last_share_time": row["last_share_time"],
+                    "inactive_time": row["inactive_time"],
+                    "h24_hashrate": row["h24_hashrate"],
+                    "rejection_rate": row["rejection_rate"],
                     "status": "inactive",
                     "timestamp": format_timestamp(),
                     "observer_user_id": user_id,
@@ -121,56 +147,60 @@ async def scrape_inactive_workers(page, access_key, user_id, coin_type, debug=Fa
                 }
                 
                 inactive_workers_data.append(inactive_worker_data)
-                print(f"Extracted inactive worker: {worker_name}")
+                logger.debug("Extracted inactive worker: %s", worker_name)
                 
             except Exception as e:
-                print(f"Error extracting inactive worker row {row_idx+1}: {e}")
-                traceback.print_exc()
+                logger.warning("Error extracting inactive worker row %d: %s", row_idx + 1, e)
         
         # Debug: Save inactive worker rows if requested
         if debug:
-            with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "debug", "inactive_worker_rows_debug.json"), "w") as f:
-                json.dump(inactive_workers_data, f, indent=2)
-            print("Saved inactive worker rows for debugging")
+            (DEBUG_DIR / "inactive_worker_rows_debug.json").write_bytes(
+                orjson.dumps(inactive_workers_data, option=orjson.OPT_INDENT_2)
+            )
+            logger.info("Saved inactive worker rows for debugging")
         
     except Exception as e:
-        print(f"Error extracting inactive workers: {e}")
-        traceback.print_exc()
+        logger.exception(f"Error extracting inactive workers: {e}")
     
-    print(f"Extracted {len(inactive_workers_data)} inactive workers for {user_id}")
+    logger.info(f"Extracted {len(inactive_workers_data)} inactive workers for {user_id}")
     return inactive_workers_data
 
 async def take_inactive_workers_screenshot(page, output_dir, user_id, timestamp_str):
     """Take a screenshot of the inactive workers page."""
     try:
         # Wait for inactive workers table to be visible
-        await page.wait_for_selector(".ant-table-wrapper", timeout=10000)
+        await page.wait_for_selector(TABLE_SELECTOR, timeout=10000)
         
-        # Take screenshot
-        screenshot_path = os.path.join(output_dir, f"{timestamp_str}_Antpool_BTC_inactive_workers.png")
-        await take_screenshot(page, screenshot_path)
-        print(f"Saved inactive workers screenshot to {screenshot_path}")
+        # Take a viewport-sized JPEG; a full-page PNG of a large table is slow to encode
+        screenshot_path = os.path.join(output_dir, f"{timestamp_str}_Antpool_BTC_inactive_workers.jpg")
+        await take_screenshot(page, screenshot_path, full_page=False, quality=70)
+        logger.info(f"Saved inactive workers screenshot to {screenshot_path}")
         return screenshot_path
     except Exception as e:
-        print(f"Error taking inactive workers screenshot: {e}")
-        traceback.print_exc()
+        logger.exception(f"Error taking inactive workers screenshot: {e}")
         return None
 
-async def save_to_supabase(supabase, inactive_workers_data):
-    """Save inactive worker data to Supabase."""
-    try:
-        # Insert data into mining_inactive_workers table
-        for worker in inactive_workers_data:
-            result = supabase.table("mining_inactive_workers").insert(worker).execute()
-            print(f"Saved inactive worker {worker['worker']} to Supabase")
-        return True
-    except Exception as e:
-        print(f"Error saving to Supabase: {e}")
-        traceback.print_exc()
-        return False
+async def save_to_supabase(supabase, inactive_workers_data, user_ids):
+    """Save inactive worker data to Supabase, then mark the accounts whose rows were all saved.
+    
+    Rows are inserted in batches off the event loop, with a row-by-row retry for a failed batch.
+    """
+    failed_rows = []
+    if inactive_workers_data:
+        failed_rows = await asyncio.to_thread(insert_in_batches, supabase, "mining_inactive_workers", inactive_workers_data)
+    unsaved_user_ids = {row.get("observer_user_id") for row in failed_rows}
+    saved_user_ids = [user_id for user_id in user_ids if user_id not in unsaved_user_ids]
+    if saved_user_ids:
+        await asyncio.to_thread(update_last_scraped, supabase, saved_user_ids)
 
-async def process_account(browser, output_dir, supabase, account, debug=False):
-    """Process a single account."""
+async def process_account(browser, output_dir, account, debug=False, screenshots=False, per_account_files=False, dump_html=False):
+    """Process a single account.
+    
+    Only scrapes and writes local files; Supabase writes are batched by main_async.
+    The account's context is seeded from the saved consent state when it is fresh,
+    otherwise consent is handled on the page and the resulting state is saved.
+    Returns the scraped inactive workers, or None if the account failed.
+    """
     try:
         # Extract account details
         account_name = account.get("account_name", "Unknown")
@@ -178,15 +208,18 @@ async def process_account(browser, output_dir, supabase, account, debug=False):
         user_id = account.get("user_id", "")
         coin_type = account.get("coin_type", "BTC")
         
-        print(f"Processing account: {account_name} ({user_id})")
+        logger.info(f"Processing account: {account_name} ({user_id})")
         
         # Skip if missing required fields
         if not access_key or not user_id:
-            print(f"Skipping account {account_name}: Missing required fields")
-            return False
+            logger.warning(f"Skipping account {account_name}: Missing required fields")
+            return None
         
-        # Create a new page for this account
-        page = await browser.new_page()
+        # Create a new context and page for this account, reusing saved consent state
+        storage_state = CONSENT_STATE_FILE if consent_state_is_fresh(CONSENT_STATE_FILE) else None
+        context = await browser.new_context(storage_state=storage_state)
+        await block_heavy_resources(context)
+        page = await context.new_page()
         
         try:
             # Get current timestamp for filenames
@@ -194,64 +227,60 @@ async def process_account(browser, output_dir, supabase, account, debug=False):
             timestamp_str = timestamp.strftime("%Y%m%d_%H%M")
             
             # Scrape inactive workers
-            inactive_workers_data = await scrape_inactive_workers(page, access_key, user_id, coin_type, debug)
-            
-            # Take screenshot
-            screenshot_path = await take_inactive_workers_screenshot(page, output_dir, user_id, timestamp_str)
+            inactive_workers_data = await scrape_inactive_workers(
+                page, access_key, user_id, coin_type, debug, dump_html,
+                handle_consent=storage_state is None
+            )
             
-            # Save to file
-            json_path = os.path.join(output_dir, f"inactive_worker_stats_{user_id}_{timestamp_str}.json")
-            save_json_to_file(inactive_workers_data, json_path)
-            print(f"Saved inactive worker data to {json_path}")
+            # Save the accepted consent state for the following accounts
+            if storage_state is None:
+                await save_consent_state(context, page, CONSENT_STATE_FILE)
             
-            # Save to Supabase
-            if supabase and inactive_workers_data:
-                await save_to_supabase(supabase, inactive_workers_data)
+            # Take screenshot (opt-in, it is not needed for the scraped data)
+            if debug or screenshots:
+                await take_inactive_workers_screenshot(page, output_dir, user_id, timestamp_str)
             
-            # Update last_scraped_at in account_credentials
-            if supabase:
-                try:
-                    supabase.table("account_credentials").update({"last_scraped_at": format_timestamp()}).eq("user_id", user_id).execute()
-                except Exception as e:
-                    print(f"Error updating last_scraped_at: {e}")
+            # Save to file
+            if per_account_files:
+                json_path = os.path.join(output_dir, f"inactive_worker_stats_{user_id}_{timestamp_str}.json")
+                await asyncio.to_thread(save_json_to_file, inactive_workers_data, json_path)
+                logger.info(f"Saved inactive worker data to {json_path}")
             
-            print(f"Successfully processed account: {account_name}")
-            return True
+            logger.info(f"Successfully processed account: {account_name}")
+            return inactive_workers_data
             
         finally:
-            # Close the page
-            await page.close()
+            # Close the context and its page
+            await context.close()
             
     except Exception as e:
-        print(f"Error processing account {account.get('account_name', 'Unknown')}: {e}")
-        traceback.print_exc()
-        return False
+        logger.exception(f"Error processing account {account.get('account_name', 'Unknown')}: {e}")
+        return None
 
 async def fetch_accounts_from_supabase(supabase):
     """Fetch accounts from Supabase."""
     try:
         # First try using the RPC function
         try:
-            print("Attempting to fetch accounts using RPC function...")
+            logger.info("Attempting to fetch accounts using RPC function...")
             response = supabase.rpc('get_all_active_accounts').execute()
             accounts = response.data
             if accounts:
-                print(f"Successfully fetched {len(accounts)} accounts using RPC function")
+                logger.info(f"Successfully fetched {len(accounts)} accounts using RPC function")
                 return accounts
         except Exception as rpc_error:
-            print(f"Error fetching accounts using RPC function: {rpc_error}")
+            logger.warning(f"Error fetching accounts using RPC function: {rpc_error}")
             # Continue to fallback method
         
         # Fallback: direct query
-        print("Falling back to direct query...")
-        response = supabase.table("account_credentials").select("*").eq("is_active", True).order("priority.desc,last_scraped_at.asc.nullsfirst").execute()
+        logger.info("Falling back to direct query...")
+        response = supabase.table("account_credentials").select(ACCOUNT_COLUMNS).eq("is_active", True).order("priority.desc,last_scraped_at.asc.nullsfirst").execute()
         accounts = response.data
-        print(f"Successfully fetched {len(accounts)} accounts using direct query")
+        logger.info(f"Successfully fetched {len(accounts)} accounts using direct query")
         return accounts
         
     except Exception as e:
-        print(f"Error fetching accounts from Supabase: {e}")
-        traceback.print_exc()
+        logger.exception(f"Error fetching accounts from Supabase: {e}")
         return []
 
 async def main_async(args):
@@ -261,7 +290,7 @@ async def main_async(args):
     
     # Create debug directory if needed
     if args.debug:
-        os.makedirs(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "debug"), exist_ok=True)
+        DEBUG_DIR.mkdir(parents=True, exist_ok=True)
     
     # Initialize Supabase client
     supabase = None
@@ -282,23 +311,67 @@ async def main_async(args):
         # Fetch accounts from Supabase
         accounts = await fetch_accounts_from_supabase(supabase)
     
+    # Drop accounts that can't be scraped before paying for a browser launch
+    skipped = [a for a in accounts if not (a.get("access_key") and a.get("user_id"))]
+    if skipped:
+        logger.warning(f"Skipping {len(skipped)} accounts missing access_key or user_id")
+        accounts = [a for a in accounts if a.get("access_key") and a.get("user_id")]
+    
     if not accounts:
-        print("No accounts to scrape. Exiting.")
+        logger.info("No accounts to scrape. Exiting.")
         return 1
     
-    print(f"Found {len(accounts)} accounts to scrape")
+    logger.info(f"Found {len(accounts)} accounts to scrape")
     
     # Initialize browser
-    async with await setup_browser() as browser:
-        # Process each account
-        results = []
-        for account in accounts:
-            result = await process_account(browser, args.output_dir, supabase, account, args.debug)
-            results.append(result)
+    async with async_playwright() as playwright:
+        browser = await launch_browser(playwright)
+        
+        try:
+            # Process each account
+            results = []
+            for idx, account in enumerate(accounts):
+                # Relaunch Chromium periodically so its memory returns to baseline;
+                # reconnecting to a browser daemon would free nothing, so it is skipped
+                if args.recycle_every > 0 and not uses_browser_daemon() and idx > 0 and idx % args.recycle_every == 0:
+                    logger.info(f"Recycling browser after {idx} accounts")
+                    await browser.close()
+                    browser = await launch_browser(playwright)
+                
+                result = await process_account(
+                    browser, args.output_dir, account,
+                    args.debug, args.screenshots, args.per_account_files,
+                    dump_html=args.debug and idx == 0
+                )
+                results.append(result)
+        finally:
+            await browser.close()
+        
+        # Save all accounts' inactive workers to a single compressed file and,
+        # concurrently, to Supabase in batches followed by one last_scraped_at update
+        all_inactive_workers = [worker for r in results if r for worker in r]
+        scraped_user_ids = [account["user_id"] for account, r in zip(accounts, results) if r is not None]
+        timestamp_str = datetime.now().strftime("%Y%m%d_%H%M")
+        output_file = os.path.join(args.output_dir, f"inactive_workers_{timestamp_str}.ndjson.gz")
+        
+        tasks = [asyncio.to_thread(save_ndjson_gz, all_inactive_workers, output_file)]
+        if supabase and scraped_user_ids:
+            tasks.append(save_to_supabase(supabase, all_inactive_workers, scraped_user_ids))
+        
+        save_results = await asyncio.gather(*tasks, return_exceptions=True)
+        save_errors = [r for r in save_results if isinstance(r, Exception)]
+        for error in save_errors:
+            logger.error(f"Error saving inactive workers: {error}", exc_info=error)
+        if not isinstance(save_results[0], Exception):
+            logger.info(f"Saved {len(all_inactive_workers)} inactive workers to {output_file}")
         
         # Print summary
-        success_count = sum(1 for r in results if r)
-        print(f"Processed {len(accounts)} accounts: {success_count} succeeded, {len(accounts) - success_count} failed")
+        success_count = sum(1 for r in results if r is not None)
+        logger.info(f"Processed {len(accounts)} accounts: {success_count} succeeded, {len(accounts) - success_count} failed")
+        
+        # Fail the run if either save failed
+        if save_errors:
+            raise save_errors[0]
     
     return 0
 
@@ -311,16 +384,21 @@ def main():
     parser.add_argument("--output_dir", default="./output", help="Output directory for JSON and screenshots")
     parser.add_argument("--skip_supabase", action="store_true", help="Skip Supabase integration")
     parser.add_argument("--debug", action="store_true", help="Enable debug mode")
+    parser.add_argument("--screenshots", action="store_true", help="Save a screenshot of each account's inactive workers page")
+    parser.add_argument("--per_account_files", action="store_true", help="Also write a JSON file per account")
+    parser.add_argument("--recycle_every", type=int, default=25, help="Relaunch the browser every N accounts to bound memory (0 to disable, default: 25; ignored with PLAYWRIGHT_CDP_ENDPOINT)")
     
     args = parser.parse_args()
+    listener = setup_logging(args.debug)
     
     # Run async main
     try:
         return asyncio.run(main_async(args))
     except Exception as e:
-        print(f"Error in main: {e}")
-        traceback.print_exc()
+        logger.exception(f"Error in main: {e}")
         return 1
+    finally:
+        listener.stop()
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -4,7 +4,7 @@ Antpool Worker Stats Scraper
 
 This script scrapes worker statistics from Antpool's observer page and saves the data
 to a JSON file. It navigates to the Worker tab and extracts data for all workers,
-setting the page size to 80 results per page.
+setting the page size to the largest option offered (80 results per page).
 
 Usage:
     python3 antpool_worker_scraper.py --access_key=<access_key> --user_id=<observer_user_id> --coin_type=<coin_type> --output_dir=<output_dir>
@@ -17,7 +17,7 @@ Example:
 
 import argparse
 import asyncio
-import json
+import base64
 import os
 import math
 import time
@@ -25,147 +25,184 @@ import re
 from datetime import datetime
 from pathlib import Path
 
+import orjson
 from playwright.async_api import async_playwright
 
 # Import utility modules
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from utils.browser_utils import setup_browser, handle_consent_dialog
-from utils.data_utils import save_json_data
+from utils.browser_utils import launch_browser, handle_consent_dialog, remove_ant_modals, block_heavy_resources
+from utils.data_utils import save_json_to_file
 from utils.supabase_utils import save_worker_stats, get_active_accounts
 
-async def extract_worker_stats(page, frame, output_dir, observer_user_id, coin_type):
-    """Extract worker statistics from the worker table."""
-    print("Extracting worker statistics...")
+# Supabase saves are enabled when its credentials are in the environment
+SUPABASE_ENABLED = bool(os.environ.get("SUPABASE_URL") and os.environ.get("SUPABASE_KEY"))
+
+# Pagination summary, e.g. "Total 123 items"
+TOTAL_ITEMS_PATTERN = re.compile(r'Total (\d+) items')
+
+# Page size options, e.g. "80 / page"; 80 is the size the scraper has always used
+PAGE_SIZE_PATTERN = re.compile(r'(\d+) / page')
+DEFAULT_PAGE_SIZE = 80
+
+# Reads the pagination summary text in one round-trip
+PAGINATION_TOTAL_JS = "() => document.querySelector('.ant-pagination-total-text')?.innerText || ''"
+
+# Antpool API responses that carry worker list data
+WORKER_API_PATTERN = re.compile(r"/api/.*worker", re.IGNORECASE)
+
+# Identifies the table's first row by its Ant Design row key, or its text if it has none
+FIRST_ROW_KEY_JS = """() => {
+    const row = document.querySelector('table tbody tr');
+    return row ? (row.getAttribute('data-row-key') || row.textContent) : null;
+}"""
+
+# Gzips an element's outerHTML in the page and returns it base64 encoded
+GZIP_OUTER_HTML_JS = """async el => {
+    const stream = new Blob([el.outerHTML]).stream().pipeThrough(new CompressionStream('gzip'));
+    const bytes = new Uint8Array(await new Response(stream).arrayBuffer());
+    let binary = '';
+    for (let i = 0; i < bytes.length; i += 0x8000) {
+        binary += String.fromCharCode(...bytes.subarray(i, i + 0x8000));
+    }
+    return btoa(binary);
+}"""
+
+def append_json_lines(output_file, records):
+    """Append records to a JSON lines file, one object per line."""
+    with open(output_file, 'ab') as f:
+        f.writelines(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE) for record in records)
+
+def json_lines_to_array(jsonl_file, json_file):
+    """Convert a JSON lines file to an indented JSON array, one record at a time.
+    
+    The output matches save_json_to_file, for readers of the legacy .json output.
+    """
+    with open(jsonl_file, 'rb') as src, open(json_file, 'wb') as dst:
+        dst.write(b"[")
+        separator = b"\n"
+        for line in src:
+            if not line.strip():
+                continue
+            record = orjson.dumps(orjson.loads(line), option=orjson.OPT_INDENT_2)
+            dst.write(separator + b"  " + record.replace(b"\n", b"\n  "))
+            separator = b",\n"
+        dst.write(b"\n]" if separator != b"\n" else b"]")
+
+async def extract_worker_stats(page, frame, output_dir, output_file, observer_user_id, coin_type, run_ts, debug=False):
+    """Extract worker statistics from the worker table.
     
-    # Ensure no modals are present
-    print("Ensuring no modals are present...")
-    await page.evaluate("""() => {
-        document.querySelectorAll('.ant-modal-close').forEach(el => el.click());
-        document.querySelectorAll('.ant-modal-mask').forEach(el => el.remove());
-        document.querySelectorAll('.ant-modal-wrap').forEach(el => el.remove());
-    }""")
-    print("Removed any modal elements")
+    Each page's workers are appended to output_file as JSON lines as soon as they
+    are read. Per-page table screenshots, HTML dumps and row JSON are only written
+    when debug is set. Every file name includes observer_user_id, since accounts
+    are scraped concurrently into the same output_dir.
+    """
+    print("Extracting worker statistics...")
     
     # Get total workers count
     print("Getting total workers count...")
-    total_text = await frame.locator('.ant-pagination-total-text').text_content()
-    total_workers_match = re.search(r'Total (\d+) items', total_text)
+    total_text = await frame.evaluate(PAGINATION_TOTAL_JS)
+    total_workers_match = TOTAL_ITEMS_PATTERN.search(total_text)
     total_workers = int(total_workers_match.group(1)) if total_workers_match else 0
     
-    # Set page size to 80
-    print("Setting page size to 80...")
-    print("Ensuring no modals are present...")
-    await page.evaluate("""() => {
-        document.querySelectorAll('.ant-modal-close').forEach(el => el.click());
-        document.querySelectorAll('.ant-modal-mask').forEach(el => el.remove());
-        document.querySelectorAll('.ant-modal-wrap').forEach(el => el.remove());
-    }""")
-    print("Removed any modal elements")
+    # Set page size to the largest option offered (80 unless a bigger one exists)
+    print("Setting page size...")
     
     await frame.locator('.ant-select-selection-item').click()
-    await frame.locator('div[title="80 / page"]').click()
-    print("Selected page size 80")
+    option_titles = await frame.locator('.ant-select-item-option').evaluate_all(
+        "options => options.map(option => option.getAttribute('title') || '')"
+    )
+    page_sizes = [int(match.group(1)) for match in map(PAGE_SIZE_PATTERN.match, option_titles) if match]
+    page_size = max(page_sizes, default=DEFAULT_PAGE_SIZE)
+    await frame.locator(f'div[title="{page_size} / page"]').click()
+    print(f"Selected page size {page_size}")
     
-    # Wait for table to update
-    await asyncio.sleep(2)
+    # Wait for table to update: it shows up to page_size rows once the new size applies
+    await frame.wait_for_function(
+        "expected => document.querySelectorAll('table tbody tr').length >= expected",
+        arg=min(total_workers, page_size),
+        timeout=15000
+    )
     
     # Capture worker table screenshot
     print("Capturing worker table screenshot...")
-    print("Ensuring no modals are present...")
-    await page.evaluate("""() => {
-        document.querySelectorAll('.ant-modal-close').forEach(el => el.click());
-        document.querySelectorAll('.ant-modal-mask').forEach(el => el.remove());
-        document.querySelectorAll('.ant-modal-wrap').forEach(el => el.remove());
-    }""")
-    print("Removed any modal elements")
     
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-    screenshot_path = os.path.join(output_dir, f"{timestamp}_Antpool_{coin_type}_workers.png")
+    screenshot_path = os.path.join(output_dir, f"{run_ts}_Antpool_{coin_type}_workers_{observer_user_id}.png")
     await page.screenshot(path=screenshot_path, full_page=True)
     print(f"Worker table screenshot saved to: {screenshot_path}")
     
     # Recalculate total workers and pages after setting page size
-    total_text = await frame.locator('.ant-pagination-total-text').text_content()
-    total_workers_match = re.search(r'Total (\d+) items', total_text)
+    total_text = await frame.evaluate(PAGINATION_TOTAL_JS)
+    total_workers_match = TOTAL_ITEMS_PATTERN.search(total_text)
     total_workers = int(total_workers_match.group(1)) if total_workers_match else 0
-    total_pages = math.ceil(total_workers / 80)
+    total_pages = math.ceil(total_workers / page_size)
     
     print(f"Total workers: {total_workers}, total pages: {total_pages}")
     
     all_workers = []
     
+    # One timestamp for the whole extraction, shared by every worker row
+    batch_timestamp = datetime.now().isoformat()
+    
     # Process each page
     for page_num in range(1, total_pages + 1):
         print(f"Processing page {page_num} of {total_pages}")
         
-        # Ensure no modals are present
-        print("Ensuring no modals are present...")
-        await page.evaluate("""() => {
-            document.querySelectorAll('.ant-modal-close').forEach(el => el.click());
-            document.querySelectorAll('.ant-modal-mask').forEach(el => el.remove());
-            document.querySelectorAll('.ant-modal-wrap').forEach(el => el.remove());
-        }""")
-        print("Removed any modal elements")
-        
-        # Get table rows
-        rows = await frame.locator('table tbody tr').all()
-        print(f"Found {len(rows)} rows in table")
-        
-        # Save table screenshot for debugging
-        table_screenshot_path = os.path.join(output_dir, f"table_page{page_num}.png")
-        await frame.locator('table').screenshot(path=table_screenshot_path)
-        print(f"Table screenshot saved to: {table_screenshot_path}")
+        # Get every row's trimmed cell texts in a single evaluate call
+        rows_data = await frame.evaluate("""() => Array.from(document.querySelectorAll('table tbody tr')).map(
+            tr => Array.from(tr.querySelectorAll('td')).map(td => (td.innerText || '').trim())
+        )""")
+        print(f"Found {len(rows_data)} rows in table")
         
-        # Save table HTML for debugging
-        table_html = await frame.locator('table').evaluate("el => el.outerHTML")
-        table_html_path = os.path.join(output_dir, f"table_html_page{page_num}.html")
-        with open(table_html_path, 'w', encoding='utf-8') as f:
-            f.write(table_html)
-        print(f"Table HTML saved to: {table_html_path}")
+        if debug:
+            # Save table screenshot for debugging
+            table_screenshot_path = os.path.join(output_dir, f"table_page{page_num}_{observer_user_id}.png")
+            await frame.locator('table').screenshot(path=table_screenshot_path)
+            print(f"Table screenshot saved to: {table_screenshot_path}")
+            
+            # Save table HTML for debugging, gzipped in the page to cut CDP traffic
+            table_html_gz = await frame.locator('table').evaluate(GZIP_OUTER_HTML_JS)
+            table_html_path = os.path.join(output_dir, f"table_html_page{page_num}_{observer_user_id}.html.gz")
+            await asyncio.to_thread(Path(table_html_path).write_bytes, base64.b64decode(table_html_gz))
+            print(f"Table HTML saved to: {table_html_path}")
         
         # Extract worker data from rows
         workers_data = []
         
-        for row in rows:
+        for cells in rows_data:
             try:
                 # Skip header rows or empty rows
-                if await row.locator('td').count() < 3:
+                if len(cells) < 3:
                     continue
                 
-                # Get all cells in the row
-                cells = await row.locator('td').all()
-                
                 # Extract worker name from the third column (index 2)
-                worker_cell = cells[2]
-                worker_name = await worker_cell.text_content()
+                worker_name = cells[2]
                 
                 # Clean up worker name
-                worker_name = worker_name.strip()
                 if "Click to view" in worker_name:
                     # Try to extract just the IP-like part
                     worker_name = worker_name.split("Click to view")[0].strip()
                 
                 # Extract other data
-                ten_min_hashrate = await cells[3].text_content() if len(cells) > 3 else ""
-                one_h_hashrate = await cells[4].text_content() if len(cells) > 4 else ""
-                h24_hashrate = await cells[5].text_content() if len(cells) > 5 else ""
-                rejection_rate = await cells[6].text_content() if len(cells) > 6 else ""
-                last_share_time = await cells[7].text_content() if len(cells) > 7 else ""
-                connections_24h = await cells[8].text_content() if len(cells) > 8 else ""
+                ten_min_hashrate = cells[3] if len(cells) > 3 else ""
+                one_h_hashrate = cells[4] if len(cells) > 4 else ""
+                h24_hashrate = cells[5] if len(cells) > 5 else ""
+                rejection_rate = cells[6] if len(cells) > 6 else ""
+                last_share_time = cells[7] if len(cells) > 7 else ""
+                connections_24h = cells[8] if len(cells) > 8 else ""
                 
                 # Create worker data dictionary
                 worker_data = {
                     "worker": worker_name,
-                    "ten_min_hashrate": ten_min_hashrate.strip(),
-                    "one_h_hashrate": one_h_hashrate.strip(),
-                    "h24_hashrate": h24_hashrate.strip(),
-                    "rejection_rate": rejection_rate.strip(),
-                    "last_share_time": last_share_time.strip(),
-                    "connections_24h": connections_24h.strip(),
+                    "ten_min_hashrate": ten_min_hashrate,
+                    "one_h_hashrate": one_h_hashrate,
+                    "h24_hashrate": h24_hashrate,
+                    "rejection_rate": rejection_rate,
+                    "last_share_time": last_share_time,
+                    "connections_24h": connections_24h,
                     "hashrate_chart": "",
                     "status": "active",
-                    "timestamp": datetime.now().isoformat(),
+                    "timestamp": batch_timestamp,
                     "observer_user_id": observer_user_id,
                     "coin_type": coin_type
                 }
@@ -175,164 +212,178 @@ async def extract_worker_stats(page, frame, output_dir, observer_user_id, coin_t
                 print(f"Error extracting data from row: {e}")
         
         # Save worker rows debug info
-        debug_path = os.path.join(output_dir, f"worker_rows_debug_page{page_num}.json")
-        with open(debug_path, 'w', encoding='utf-8') as f:
-            json.dump(workers_data, f, indent=2)
-        print(f"Worker rows debug info saved to: {debug_path}")
+        if debug:
+            debug_path = os.path.join(output_dir, f"worker_rows_debug_page{page_num}_{observer_user_id}.json")
+            await asyncio.to_thread(save_json_to_file, workers_data, debug_path)
         
         print(f"Found {len(workers_data)} workers on page {page_num}")
         if workers_data:
             print(f"First worker data: {workers_data[0]}")
         
         all_workers.extend(workers_data)
+        await asyncio.to_thread(append_json_lines, output_file, workers_data)
         
         # Navigate to next page if not on the last page
         if page_num < total_pages:
             print(f"Navigating to page {page_num + 1}...")
-            await frame.locator('button.ant-pagination-item-link[aria-label="Next page"]').click()
-            await asyncio.sleep(2)  # Wait for page to load
+            prev_first_row = await frame.evaluate(FIRST_ROW_KEY_JS)
+            await frame.locator(f'.ant-pagination-item-{page_num + 1}').click()
+            # Wait for page to load: the first row changes once the next page renders
+            await frame.wait_for_function(
+                f"prev => ({FIRST_ROW_KEY_JS})() !== prev",
+                arg=prev_first_row,
+                timeout=15000
+            )
     
     print(f"Total workers extracted: {len(all_workers)}")
     return all_workers, screenshot_path
 
-async def process_account(access_key, user_id, coin_type, output_dir):
-    """Process a single account."""
+async def process_account(browser, access_key, user_id, coin_type, output_dir, debug=False):
+    """Process a single account in its own context of the shared browser."""
     print(f"\n==================================================")
     print(f"Processing account: {user_id} ({coin_type})")
     print(f"==================================================")
     
-    async with async_playwright() as playwright:
-        # Launch browser
-        print("Launching browser...")
-        browser, context, page = await setup_browser(playwright)
-        
+    # One timestamp for every file this account writes
+    run_ts = datetime.now().strftime("%Y%m%d_%H%M")
+    
+    context = await browser.new_context(viewport={"width": 1920, "height": 1080})
+    await remove_ant_modals(context)
+    await block_heavy_resources(context)
+    page = await context.new_page()
+    
+    # Capture the worker list JSON the table is rendered from
+    worker_api_responses = []
+    
+    async def capture_worker_api(response):
+        if not WORKER_API_PATTERN.search(response.url):
+            return
+        if "json" not in response.headers.get("content-type", ""):
+            return
         try:
-            # Navigate to observer page
-            observer_url = f"https://www.antpool.com/observer?accessKey={access_key}&coinType={coin_type}&observerUserId={user_id}"
-            print(f"Navigating to observer page: {observer_url}")
-            await page.goto(observer_url)
-            print("Page loaded")
-            
-            # Handle consent dialog
-            print("Handling consent dialog...")
-            await handle_consent_dialog(page)
-            print("Consent dialog handling completed")
-            
-            # Wait for hashrate chart to load
-            print("Waiting for hashrate chart...")
-            await page.wait_for_selector(".ant-card-body", timeout=30000)
-            print("Hashrate chart loaded successfully")
-            
-            # Ensure no modals are present
-            print("Ensuring no modals are present...")
-            await page.evaluate("""() => {
-                document.querySelectorAll('.ant-modal-close').forEach(el => el.click());
-                document.querySelectorAll('.ant-modal-mask').forEach(el => el.remove());
-                document.querySelectorAll('.ant-modal-wrap').forEach(el => el.remove());
-            }""")
-            print("Removed any modal elements")
-            
-            # Navigate to Worker tab
-            print("Navigating to Worker tab...")
-            print("Ensuring no modals are present...")
-            await page.evaluate("""() => {
-                document.querySelectorAll('.ant-modal-close').forEach(el => el.click());
-                document.querySelectorAll('.ant-modal-mask').forEach(el => el.remove());
-                document.querySelectorAll('.ant-modal-wrap').forEach(el => el.remove());
-            }""")
-            print("Removed any modal elements")
-            
-            # Click Worker tab using JavaScript
-            await page.evaluate("""() => {
-                const tabs = document.querySelectorAll('.ant-tabs-tab');
-                for (const tab of tabs) {
-                    if (tab.textContent.includes('Worker')) {
-                        tab.click();
-                        return true;
-                    }
+            # Keep the full request so it can be replayed without the browser
+            request = response.request
+            worker_api_responses.append({
+                "url": response.url,
+                "method": request.method,
+                "post_data": request.post_data,
+                "status": response.status,
+                "body": await response.json()
+            })
+        except Exception as e:
+            print(f"Error reading worker API response {response.url}: {e}")
+    
+    page.on("response", capture_worker_api)
+    
+    try:
+        # Navigate to observer page
+        observer_url = f"https://www.antpool.com/observer?accessKey={access_key}&coinType={coin_type}&observerUserId={user_id}"
+        print(f"Navigating to observer page: {observer_url}")
+        await page.goto(observer_url)
+        print("Page loaded")
+        
+        # Handle consent dialog
+        print("Handling consent dialog...")
+        await handle_consent_dialog(page)
+        print("Consent dialog handling completed")
+        
+        # Wait for hashrate chart to load
+        print("Waiting for hashrate chart...")
+        await page.wait_for_selector(".ant-card-body", timeout=30000)
+        print("Hashrate chart loaded successfully")
+        
+        # Navigate to Worker tab
+        print("Navigating to Worker tab...")
+        
+        # Click Worker tab using JavaScript
+        await page.evaluate("""() => {
+            const tabs = document.querySelectorAll('.ant-tabs-tab');
+            for (const tab of tabs) {
+                if (tab.textContent.includes('Worker')) {
+                    tab.click();
+                    return true;
                 }
-                return false;
-            }""")
-            print("Clicked Worker tab using JavaScript")
-            
-            # Take screenshot after clicking Worker tab
-            worker_tab_screenshot = os.path.join(output_dir, "worker_tab_clicked.png")
+            }
+            return false;
+        }""")
+        print("Clicked Worker tab using JavaScript")
+        
+        # Take screenshot after clicking Worker tab
+        if debug:
+            worker_tab_screenshot = os.path.join(output_dir, f"worker_tab_clicked_{user_id}.png")
             await page.screenshot(path=worker_tab_screenshot)
             print(f"Screenshot saved after clicking Worker tab: {worker_tab_screenshot}")
-            
-            # Wait for worker table to load
-            await page.wait_for_selector("table", timeout=30000)
-            print("Worker table loaded")
-            
-            # Find the frame containing the worker table
-            print("Ensuring no modals are present...")
-            await page.evaluate("""() => {
-                document.querySelectorAll('.ant-modal-close').forEach(el => el.click());
-                document.querySelectorAll('.ant-modal-mask').forEach(el => el.remove());
-                document.querySelectorAll('.ant-modal-wrap').forEach(el => el.remove());
-            }""")
-            print("Removed any modal elements")
-            
-            frames = page.frames
-            print(f"Found {len(frames)} frames on the page")
-            
-            main_frame = page.main_frame
-            print(f"Checking frame 0: {main_frame.name} - URL: {main_frame.url}")
-            
-            # Count tables in main frame
-            tables_count = await main_frame.locator('table').count()
-            print(f"Found {tables_count} tables in frame 0")
-            
-            # Use main frame for extraction
-            frame_to_use = main_frame
-            print(f"Using frame with URL: {frame_to_use.url}")
-            
-            # Wait for loading indicators to disappear
-            await page.wait_for_function("""() => {
-                return !document.querySelector('.ant-spin-spinning') && 
-                       !document.querySelector('.ant-spin-dot') &&
-                       !document.querySelector('.loading');
-            }""")
-            print("Loading indicators disappeared")
-            
-            # Extract worker statistics
-            worker_stats, screenshot_path = await extract_worker_stats(
-                page, frame_to_use, output_dir, user_id, coin_type
-            )
-            
-            # Save worker statistics to JSON file
-            print("Saving worker statistics...")
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-            output_file = os.path.join(output_dir, f"worker_stats_{user_id}_{timestamp}.json")
-            
-            save_json_data(worker_stats, output_file)
-            print(f"Worker statistics saved to: {output_file}")
-            
-            # Save to Supabase if environment variables are set
-            if os.environ.get("SUPABASE_URL") and os.environ.get("SUPABASE_KEY"):
-                try:
-                    result = save_worker_stats(worker_stats)
-                    print(f"Supabase save result: {result}")
-                except Exception as e:
-                    print(f"Error saving to Supabase: {e}")
-            
-            print("Scraping completed successfully!")
-            print(f"Total workers extracted: {len(worker_stats)}")
-            print(f"Output file: {output_file}")
-            print(f"Screenshot: {screenshot_path}")
-            
-            return True
-            
-        except Exception as e:
-            print(f"Error: {e}")
-            import traceback
-            traceback.print_exc()
-            return False
-            
-        finally:
-            # Close browser
-            await browser.close()
-            print("Browser closed")
+        
+        # Wait for worker table to load
+        await page.wait_for_selector("table", timeout=30000)
+        print("Worker table loaded")
+        
+        # Find the frame containing the worker table
+        frames = page.frames
+        print(f"Found {len(frames)} frames on the page")
+        
+        main_frame = page.main_frame
+        print(f"Checking frame 0: {main_frame.name} - URL: {main_frame.url}")
+        
+        # Count tables in main frame
+        tables_count = await main_frame.locator('table').count()
+        print(f"Found {tables_count} tables in frame 0")
+        
+        # Use main frame for extraction
+        frame_to_use = main_frame
+        print(f"Using frame with URL: {frame_to_use.url}")
+        
+        # Wait for loading indicators to disappear
+        # (wait_for_function already polls on requestAnimationFrame by default)
+        await page.wait_for_function(
+            "() => !document.querySelector('.ant-spin-spinning, .ant-spin-dot, .loading')"
+        )
+        print("Loading indicators disappeared")
+        
+        # Extract worker statistics, streaming them to a JSON lines file
+        output_file = os.path.join(output_dir, f"worker_stats_{user_id}_{run_ts}.jsonl")
+        Path(output_file).write_bytes(b"")
+        
+        worker_stats, screenshot_path = await extract_worker_stats(
+            page, frame_to_use, output_dir, output_file, user_id, coin_type, run_ts, debug
+        )
+        
+        # Also write the legacy JSON array that downstream readers expect
+        json_output_file = output_file[:-len(".jsonl")] + ".json"
+        await asyncio.to_thread(json_lines_to_array, output_file, json_output_file)
+        print(f"Worker statistics saved to: {output_file} and {json_output_file}")
+        
+        # Save captured worker API responses alongside the table data
+        if worker_api_responses:
+            api_output_file = os.path.join(output_dir, f"worker_api_{user_id}_{run_ts}.json")
+            await asyncio.to_thread(save_json_to_file, worker_api_responses, api_output_file)
+            print(f"Captured {len(worker_api_responses)} worker API responses")
+        
+        # Save to Supabase if environment variables are set, in a worker thread so
+        # the other accounts keep scraping while the insert is in flight
+        if SUPABASE_ENABLED:
+            try:
+                result = await asyncio.to_thread(save_worker_stats, worker_stats)
+                print(f"Supabase save result: {result}")
+            except Exception as e:
+                print(f"Error saving to Supabase: {e}")
+        
+        print("Scraping completed successfully!")
+        print(f"Total workers extracted: {len(worker_stats)}")
+        print(f"Output files: {output_file}, {json_output_file}")
+        print(f"Screenshot: {screenshot_path}")
+        
+        return True
+        
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+        
+    finally:
+        # Close this account's context
+        await context.close()
 
 async def main():
     """Main function."""
@@ -342,6 +393,7 @@ async def main():
     parser.add_argument("--coin_type", default="BTC", help="Coin type (default: BTC)")
     parser.add_argument("--output_dir", help="Output directory for JSON and screenshots")
     parser.add_argument("--use_supabase", action="store_true", help="Use Supabase to get account credentials")
+    parser.add_argument("--debug", action="store_true", help="Save per-page table screenshots, HTML and row JSON for debugging")
     
     args = parser.parse_args()
     
@@ -352,9 +404,8 @@ async def main():
     # Create output directory if it doesn't exist
     os.makedirs(args.output_dir, exist_ok=True)
     
-    # Process accounts
-    accounts_processed = 0
-    successful_accounts = 0
+    # Collect accounts to process
+    accounts_to_scrape = []
     
     if args.use_supabase:
         # Get active accounts from Supabase
@@ -366,7 +417,6 @@ async def main():
         
         print(f"Retrieved {len(active_accounts)} active accounts from Supabase")
         
-        # Process each active account
         for account in active_accounts:
             access_key = account.get("access_key")
             user_id = account.get("user_id")
@@ -376,11 +426,7 @@ async def main():
                 print(f"Skipping account with missing credentials: {account}")
                 continue
             
-            print(f"Starting Antpool worker scraper for {user_id} ({coin_type})...")
-            success = await process_account(access_key, user_id, coin_type, args.output_dir)
-            accounts_processed += 1
-            if success:
-                successful_accounts += 1
+            accounts_to_scrape.append((access_key, user_id, coin_type))
     else:
         # Use command-line arguments
         if not args.access_key or not args.user_id:
@@ -389,11 +435,35 @@ async def main():
             print("   or: python3 antpool_worker_scraper.py --use_supabase [--output_dir=<output_dir>]")
             return
         
-        print(f"Starting Antpool worker scraper for {args.user_id} ({args.coin_type})...")
-        success = await process_account(args.access_key, args.user_id, args.coin_type, args.output_dir)
-        accounts_processed += 1
-        if success:
-            successful_accounts += 1
+        accounts_to_scrape.append((args.access_key, args.user_id, args.coin_type))
+    
+    # Process accounts concurrently in one browser, at most SCRAPE_CONCURRENCY at a time
+    semaphore = asyncio.Semaphore(int(os.environ.get("SCRAPE_CONCURRENCY", 4)))
+    
+    async with async_playwright() as playwright:
+        print("Launching browser...")
+        browser = await launch_browser(playwright)
+        
+        async def run_account(access_key, user_id, coin_type):
+            async with semaphore:
+                print(f"Starting Antpool worker scraper for {user_id} ({coin_type})...")
+                return await process_account(browser, access_key, user_id, coin_type, args.output_dir, args.debug)
+        
+        try:
+            results = await asyncio.gather(
+                *[run_account(*account) for account in accounts_to_scrape],
+                return_exceptions=True
+            )
+        finally:
+            await browser.close()
+            print("Browser closed")
+    
+    for (_, user_id, _), result in zip(accounts_to_scrape, results):
+        if isinstance(result, Exception):
+            print(f"Error processing account {user_id}: {result}")
+    
+    accounts_processed = len(results)
+    successful_accounts = sum(1 for result in results if result is True)
     
     print("Scraping completed successfully!")
     print(f"Total accounts processed: {accounts_processed}")
@@ -8,15 +8,17 @@ retry logic, and performance optimizations.
 
 import os
 import sys
-import json
 import logging
 import asyncio
 import re
+import time
 from datetime import datetime
 import traceback
 from pathlib import Path
 from typing import List, Dict, Optional, Any
 
+from playwright.async_api import async_playwright
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -27,47 +29,101 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Pagination summary, e.g. "Total 123 items"
+TOTAL_ITEMS_PATTERN = re.compile(r'Total\s+(\d+)\s+items', re.IGNORECASE)
+
+# Last share times this old mark a worker as inactive
+STALE_SHARE_PATTERN = re.compile(r'day|week|month', re.IGNORECASE)
+
+# Antpool API responses that carry worker list data, and the keys their record total may use
+WORKER_API_PATTERN = re.compile(r"/api/.*worker", re.IGNORECASE)
+API_TOTAL_KEYS = ("totalRecord", "totalCount", "total")
+
+# Minimum seconds between observer page navigations across all concurrent accounts
+NAVIGATION_INTERVAL = float(os.environ.get("NAVIGATION_INTERVAL", 1.5))
+_next_navigation_at = 0.0
+
+# Only the account_credentials columns main reads
+ACCOUNT_COLUMNS = "access_key,user_id,coin_type"
+
+# True once the worker table has no loading spinner
+TABLE_IDLE_JS = "() => !document.querySelector('.ant-spin-spinning')"
+
+# Text of the pagination size changer (e.g. "10 / page"), or null if the table has none
+PAGE_SIZE_JS = "() => document.querySelector('.ant-pagination-options')?.innerText.trim() || null"
+
+# Text of the worker table's first row, used to detect a page change
+FIRST_ROW_TEXT_JS = "() => document.querySelector('table tbody tr')?.innerText || ''"
+
+# Selector union matching an enabled next page button in a single query. A union
+# returns its first match in document order, so every branch is scoped to the
+# pagination control; a bare text match could pick an unrelated button earlier on the page
+NEXT_BUTTON_SELECTOR = ", ".join((
+    'button[aria-label="Next page"]:not([disabled])',
+    '.ant-pagination-next:not([disabled])',
+    'li.ant-pagination-next:not(.ant-pagination-disabled) button',
+    'button[title="Next Page"]:not([disabled])'
+))
+
+# True if a pagination button, or the <li> wrapping it, is disabled
+NEXT_DISABLED_JS = """el => el.disabled
+    || (el.getAttribute('class') || '').includes('disabled')
+    || (el.parentElement?.getAttribute('class') || '').includes('disabled')"""
+
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    from utils.browser_utils import setup_browser, handle_consent_dialog, take_screenshot
+    from utils.browser_utils import launch_browser, uses_browser_daemon, handle_consent_dialog, take_screenshot, block_heavy_resources
     from utils.data_utils import save_json_to_file, format_timestamp
-    from utils.supabase_utils import get_supabase_client, filter_schema_fields_list
+    from utils.supabase_utils import get_supabase_client, filter_schema_fields_list, insert_in_batches, update_last_scraped
 except ImportError:
     # Fallback for direct script execution
     sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-    from utils.browser_utils import setup_browser, handle_consent_dialog, take_screenshot
+    from utils.browser_utils import launch_browser, uses_browser_daemon, handle_consent_dialog, take_screenshot, block_heavy_resources
     from utils.data_utils import save_json_to_file, format_timestamp
-    from utils.supabase_utils import get_supabase_client, filter_schema_fields_list
+    from utils.supabase_utils import get_supabase_client, filter_schema_fields_list, insert_in_batches, update_last_scraped
 
 async def scrape_workers(page: Any, access_key: str, user_id: str, coin_type: str, debug: bool = False) -> List[Dict[str, Any]]:
     """Scrape worker statistics from Antpool with retry logic."""
     logger.info(f"Starting worker scrape for {user_id} ({coin_type})")
     
     max_retries = 3
-    retry_delay = 5  # seconds
+    max_retry_delay = 5  # seconds
+    
+    # Record worker totals reported by the worker list API as the page loads
+    api_totals = []
+    
+    async def capture_api_total(response):
+        if not WORKER_API_PATTERN.search(response.url):
+            return
+        try:
+            total = _find_api_total(await response.json())
+        except Exception:
+            return
+        if total is not None:
+            api_totals.append(total)
+    
+    page.on("response", capture_api_total)
     
     for attempt in range(max_retries):
         try:
             # Navigate to observer page
             observer_url = f"https://www.antpool.com/observer?accessKey={access_key}&coinType={coin_type}&observerUserId={user_id}"
-            await page.goto(observer_url, wait_until="domcontentloaded")
+            await _wait_for_navigation_slot()
+            # Return once the response starts; the selector waits below handle readiness
+            await page.goto(observer_url, wait_until="commit")
             logger.info(f"Navigated to observer page for {user_id}")
             
             # Handle informed consent dialog
             try:
                 await page.wait_for_selector('text="INFORMED CONSENT"', timeout=10000)
                 await page.click('text="Got it"')  # Check the checkbox
-                await asyncio.sleep(1)
                 await page.click('button:has-text("Confirm")')  # Click confirm
                 logger.info("Consent dialog handled")
             except Exception as e:
                 logger.debug(f"No consent dialog or error handling it: {e}")
             
-            # Wait for page to load completely
-            await asyncio.sleep(3)
-            
             # The Worker tab should already be active, verify we can see the table
             await page.wait_for_selector('text="Worker"', timeout=15000)
             logger.info("Worker tab found")
@@ -76,85 +132,117 @@ async def scrape_workers(page: Any, access_key: str, user_id: str, coin_type: st
             await page.wait_for_selector('table', timeout=15000)
             logger.info("Worker table loaded successfully")
 
-            # Set page size to 80 (maximum available)
+            # Set page size to 80 (maximum available), unless it already is or
+            # the table has no size changer
             try:
-                await page.click('text="10 /page"')
-                await asyncio.sleep(1)
-                await page.click('text="80 /page"')
-                await asyncio.sleep(3)  # Wait for table to reload
-                logger.info("Page size set to 80")
+                page_size = await page.evaluate(PAGE_SIZE_JS)
+                if page_size is None or page_size.startswith("80"):
+                    logger.info(f"Leaving page size as is ({page_size})")
+                else:
+                    await page.click('text="10 /page"')
+                    await page.click('text="80 /page"')
+                    # Wait for table to reload: more than 10 rows, or only one page of workers
+                    await page.wait_for_function(
+                        "() => document.querySelectorAll('table tbody tr').length > 10"
+                        " || !!document.querySelector('.ant-pagination-next.ant-pagination-disabled')",
+                        timeout=5000
+                    )
+                    logger.info("Page size set to 80")
             except Exception as e:
                 logger.warning(f"Could not set page size: {e}")
             
-            workers_data = await _extract_worker_data(page, user_id, coin_type, debug)
+            api_total = api_totals[-1] if api_totals else None
+            workers_data = await _extract_worker_data(page, user_id, coin_type, debug, api_total)
             return workers_data
             
         except Exception as e:
             logger.error(f"Attempt {attempt + 1} failed: {str(e)}")
             if attempt == max_retries - 1:
                 raise
-            await asyncio.sleep(retry_delay)
+            # Back off exponentially: 0.5s, 1s, 2s, ... capped at max_retry_delay
+            await asyncio.sleep(min(0.5 * 2 ** attempt, max_retry_delay))
             continue
 
-async def _extract_worker_data(page: Any, user_id: str, coin_type: str, debug: bool) -> List[Dict[str, Any]]:
-    """Extract worker data from the table with proper error handling."""
+async def _wait_for_navigation_slot() -> None:
+    """Space observer navigations NAVIGATION_INTERVAL seconds apart to avoid rate limiting."""
+    global _next_navigation_at
+    now = time.monotonic()
+    slot = max(now, _next_navigation_at)
+    _next_navigation_at = slot + NAVIGATION_INTERVAL
+    await asyncio.sleep(slot - now)
+
+def _find_api_total(payload: Any) -> Optional[int]:
+    """Return the record total from a worker list API payload, or None if it has none."""
+    candidates = [payload]
+    if isinstance(payload, dict) and isinstance(payload.get("data"), dict):
+        candidates.append(payload["data"])
+    for candidate in candidates:
+        if not isinstance(candidate, dict):
+            continue
+        for key in API_TOTAL_KEYS:
+            value = candidate.get(key)
+            if isinstance(value, int) and not isinstance(value, bool):
+                return value
+    return None
+
+async def _extract_worker_data(page: Any, user_id: str, coin_type: str, debug: bool, api_total: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Extract worker data from the table with proper error handling.
+    
+    api_total is the worker count reported by the worker list API, when one was
+    captured. Its schema is unconfirmed, so it is only compared against the
+    pagination total in the DOM and never used to limit pagination.
+    """
     workers_data = []
     
     try:
         # Get total number of workers from pagination text
         total_workers = 0
         total_pages = 1
+        pagination_text = None
         try:
-            # Wait for pagination to load
-            await asyncio.sleep(2)
-            
             # Try multiple approaches to find pagination info
-            pagination_text = None
             
-            # Method 1: Look for "Total X items" text anywhere on the page
+            # Method 1: Read the pagination total text
             try:
-                page_content = await page.content()
-                total_match = re.search(r'Total (\d+) items', page_content, re.IGNORECASE)
+                total_text = await page.locator('.ant-pagination-total-text').first.text_content(timeout=2000)
+                total_match = TOTAL_ITEMS_PATTERN.search(total_text or '')
                 if total_match:
                     total_workers = int(total_match.group(1))
                     pagination_text = f"Total {total_workers} items"
-                    logger.info(f"Found total workers from page content: {total_workers}")
+                    logger.info(f"Found total workers from pagination: {total_workers}")
             except Exception as e:
                 logger.debug(f"Method 1 failed: {e}")
             
-            # Method 2: Look for pagination elements with text content
+            # Method 2: Look for "Total X items" anywhere in the page text, matched in the page
             if not pagination_text:
                 try:
-                    # Look for elements containing "Total" and numbers
-                    elements = await page.query_selector_all('*')
-                    for element in elements:
-                        try:
-                            text = await element.text_content()
-                            if text and 'Total' in text and 'items' in text:
-                                match = re.search(r'Total (\d+) items', text, re.IGNORECASE)
-                                if match:
-                                    total_workers = int(match.group(1))
-                                    pagination_text = text.strip()
-                                    logger.info(f"Found pagination text: {pagination_text}")
-                                    break
-                        except:
-                            continue
+                    text = await page.evaluate("""() => {
+                        const match = (document.body.textContent || '').match(/Total\\s+\\d+\\s+items/i);
+                        return match ? match[0] : null;
+                    }""")
+                    match = TOTAL_ITEMS_PATTERN.search(text or '')
+                    if match:
+                        total_workers = int(match.group(1))
+                        pagination_text = text.strip()
+                        logger.info(f"Found pagination text: {pagination_text}")
                 except Exception as e:
                     logger.debug(f"Method 2 failed: {e}")
             
+            # Cross-check the DOM total against the worker list API; the DOM wins
+            if api_total is not None:
+                if not pagination_text:
+                    logger.info(f"Worker API reported {api_total} workers, but no pagination total to check it against")
+                elif api_total != total_workers:
+                    logger.warning(f"Worker API total {api_total} differs from pagination total {total_workers}, using pagination")
+            
             # Method 3: Count pagination buttons to estimate pages
             if total_workers == 0:
                 try:
                     # Look for numbered pagination buttons
-                    page_buttons = await page.query_selector_all('button[class*="pagination"], .ant-pagination-item, a[class*="page"]')
-                    page_numbers = []
-                    for button in page_buttons:
-                        try:
-                            text = await button.text_content()
-                            if text and text.isdigit():
-                                page_numbers.append(int(text))
-                        except:
-                            continue
+                    button_texts = await page.locator('button[class*="pagination"], .ant-pagination-item, a[class*="page"]').evaluate_all(
+                        "buttons => buttons.map(button => button.textContent || '')"
+                    )
+                    page_numbers = [int(text) for text in button_texts if text.isdigit()]
                     
                     if page_numbers:
                         estimated_pages = max(page_numbers)
@@ -170,7 +258,7 @@ async def _extract_worker_data(page: Any, user_id: str, coin_type: str, debug: b
             else:
                 # Final fallback: check if there are next/pagination buttons
                 try:
-                    next_buttons = await page.query_selector_all('button[aria-label="Next page"], .ant-pagination-next, button:has-text(">")')
+                    next_buttons = await page.locator('button[aria-label="Next page"], .ant-pagination-next, button:has-text(">")').count()
                     total_pages = 2 if next_buttons else 1
                     logger.info(f"Final fallback: Set total_pages to {total_pages} based on next button presence")
                 except:
@@ -182,18 +270,26 @@ async def _extract_worker_data(page: Any, user_id: str, coin_type: str, debug: b
             logger.warning(f"Could not get pagination info: {e}")
             total_pages = 1
         
+        # One timestamp for the whole scrape, shared by every worker row
+        timestamp = format_timestamp()
+        
         # Process pages dynamically - continue until no more pages
         page_num = 1
-        max_pages = max(total_pages, 10)  # Safety limit
+        # Trust the page count when the total came from the pagination text
+        # (recomputed below from the first page's row count, in case the page size
+        # switch failed); otherwise allow up to 10 pages as a safety limit
+        max_pages = total_pages if pagination_text else max(total_pages, 10)
         
         while page_num <= max_pages:
             logger.info(f"Processing page {page_num} (estimated total: {total_pages})")
             
             # Wait for table to be stable
-            await asyncio.sleep(2)
+            await page.wait_for_function(TABLE_IDLE_JS, timeout=10000)
             
-            # Get table rows
-            rows = await page.query_selector_all('table tbody tr')
+            # Get the first 9 cell texts of every table row in a single call, without row handles
+            rows = await page.locator('table tbody tr').evaluate_all(
+                "rows => rows.map(row => [...row.querySelectorAll('td')].slice(0, 9).map(cell => cell.innerText.trim()))"
+            )
             logger.info(f"Found {len(rows)} rows on page {page_num}")
             
             # If no rows found, we might be done
@@ -203,9 +299,9 @@ async def _extract_worker_data(page: Any, user_id: str, coin_type: str, debug: b
             
             # Process each row
             page_workers = 0
-            for row_idx, row in enumerate(rows):
+            for row_idx, cell_texts in enumerate(rows):
                 try:
-                    worker_data = await _process_worker_row(row, user_id, coin_type, page_num, row_idx + 1)
+                    worker_data = _process_worker_row(cell_texts, user_id, coin_type, timestamp, page_num, row_idx + 1)
                     if worker_data:
                         workers_data.append(worker_data)
                         page_workers += 1
@@ -217,63 +313,48 @@ async def _extract_worker_data(page: Any, user_id: str, coin_type: str, debug: b
             
             logger.info(f"Extracted {page_workers} workers from page {page_num}")
             
+            # Stop without probing for a next button once this is provably the last
+            # page: the known total is reached, or the page has fewer workers than
+            # the first. Counts use extracted workers, not raw rows, since tbody
+            # also holds measure and placeholder rows
+            if page_num == 1:
+                full_page_workers = page_workers
+                if not full_page_workers:
+                    logger.info("No workers on page 1, stopping pagination")
+                    break
+                if pagination_text:
+                    max_pages = -(-total_workers // full_page_workers)
+            if (pagination_text and len(workers_data) >= total_workers) or page_workers < full_page_workers:
+                logger.info(f"Last page reached at page {page_num}")
+                break
+            
             # Check if there's a next page
             try:
-                # Try multiple selectors for next button
-                next_button = None
-                next_selectors = [
-                    'button[aria-label="Next page"]:not([disabled])',
-                    '.ant-pagination-next:not([disabled])',
-                    'button:has-text(">"):not([disabled])',
-                    'li.ant-pagination-next:not(.ant-pagination-disabled) button',
-                    'button[title="Next Page"]:not([disabled])'
-                ]
-                
-                for selector in next_selectors:
-                    try:
-                        buttons = await page.query_selector_all(selector)
-                        if buttons:
-                            next_button = buttons[0]
-                            logger.debug(f"Found next button with selector: {selector}")
-                            break
-                    except:
-                        continue
+                # Find the next button with one selector union
+                next_button = await page.query_selector(NEXT_BUTTON_SELECTOR)
                 
                 if not next_button:
-                    # Try to find any clickable pagination element with number > current page
-                    try:
-                        page_buttons = await page.query_selector_all('button, a')
-                        for button in page_buttons:
-                            text = await button.text_content()
-                            if text and text.isdigit() and int(text) == page_num + 1:
-                                next_button = button
-                                logger.debug(f"Found next page button with number: {text}")
-                                break
-                    except:
-                        pass
+                    # Fall back to the numbered pagination item for the next page
+                    next_button = await page.query_selector(f'.ant-pagination-item-{page_num + 1}')
                 
                 if not next_button:
                     logger.info(f"No enabled next button found, finished at page {page_num}")
                     break
                 
                 # Check if next button is disabled
-                is_disabled = await next_button.get_attribute('disabled')
-                class_name = await next_button.get_attribute('class') or ''
-                parent_class = ''
-                try:
-                    parent = await next_button.query_selector('..')
-                    if parent:
-                        parent_class = await parent.get_attribute('class') or ''
-                except:
-                    pass
-                
-                if is_disabled or 'disabled' in class_name or 'disabled' in parent_class:
+                if await next_button.evaluate(NEXT_DISABLED_JS):
                     logger.info(f"Next button is disabled, finished at page {page_num}")
                     break
                 
-                # Click next page
+                # Click next page and wait for the first row to change and the next page to be active
+                first_row_before = await page.evaluate(FIRST_ROW_TEXT_JS)
                 await next_button.click()
-                await asyncio.sleep(3)  # Wait for page to load
+                await page.wait_for_function(
+                    f"""([before, nextPage]) => ({FIRST_ROW_TEXT_JS})() !== before
+                        && document.querySelector('.ant-pagination-item-active')?.textContent.trim() === String(nextPage)""",
+                    arg=[first_row_before, page_num + 1],
+                    timeout=10000
+                )
                 logger.info(f"Navigated to page {page_num + 1}")
                 page_num += 1
                 
@@ -288,18 +369,11 @@ async def _extract_worker_data(page: Any, user_id: str, coin_type: str, debug: b
         logger.error(f"Error extracting worker data: {str(e)}")
         raise
 
-async def _process_worker_row(row: Any, user_id: str, coin_type: str, page_num: int, row_num: int) -> Optional[Dict[str, Any]]:
-    """Process a single worker row and return extracted data."""
-    cells = await row.query_selector_all("td")
-    if len(cells) < 5:
+def _process_worker_row(cell_texts: List[str], user_id: str, coin_type: str, timestamp: str, page_num: int, row_num: int) -> Optional[Dict[str, Any]]:
+    """Build worker data from a row's cell texts (up to the first 9 cells)."""
+    if len(cell_texts) < 5:
         return None
     
-    # Extract text from each cell
-    cell_texts = []
-    for i, cell in enumerate(cells[:9]):  # Get up to 9 cells
-        text = await cell.inner_text()
-        cell_texts.append(text.strip())
-    
     # Skip header rows, empty rows, or rows without worker name in 3rd cell
     worker_name = cell_texts[2] if len(cell_texts) > 2 else ""
     if not worker_name or "Worker" in worker_name or worker_name == "No filter data":
@@ -315,14 +389,13 @@ async def _process_worker_row(row: Any, user_id: str, coin_type: str, page_num:
         "rejection_rate": cell_texts[6] if len(cell_texts) > 6 else "",
         "last_share_time": cell_texts[7] if len(cell_texts) > 7 else "",
         "connections_24h": cell_texts[8] if len(cell_texts) > 8 else "",
-        "timestamp": format_timestamp(),
+        "timestamp": timestamp,
         "observer_user_id": user_id,
         "coin_type": coin_type
     }
     
     # Determine worker status based on last share time
-    last_share = worker_data["last_share_time"].lower()
-    is_active = not ("day" in last_share or "week" in last_share or "month" in last_share)
+    is_active = not STALE_SHARE_PATTERN.search(worker_data["last_share_time"])
     worker_data["status"] = "active" if is_active else "inactive"
     
     return worker_data
@@ -334,7 +407,7 @@ async def take_workers_screenshot(page, output_dir, user_id, timestamp_str):
         await page.wait_for_selector("table", timeout=10000)
         
         # Take screenshot
-        screenshot_path = os.path.join(output_dir, f"{timestamp_str}_Antpool_BTC_workers.png")
+        screenshot_path = os.path.join(output_dir, f"{timestamp_str}_Antpool_BTC_workers_{user_id}.png")
         await take_screenshot(page, screenshot_path)
         logger.info(f"Saved workers screenshot to {screenshot_path}")
         return screenshot_path
@@ -342,49 +415,42 @@ async def take_workers_screenshot(page, output_dir, user_id, timestamp_str):
         logger.error(f"Error taking screenshot: {str(e)}")
         return None
 
-async def save_to_supabase(supabase, workers_data):
-    """Save worker data to Supabase with error handling."""
-    if not supabase or not workers_data:
-        return False
+def upload_workers_to_supabase(supabase, workers_data):
+    """Insert workers into mining_workers in batches, falling back to row inserts for a failed batch.
+    
+    Returns the workers that could not be saved.
+    """
+    logger.info(f"===== Uploading {len(workers_data)} Workers to Supabase =====")
     
     # Filter worker data to include only fields in the schema
     filtered_workers_data = filter_schema_fields_list(workers_data, "mining_workers")
-        
-    try:
-        result = supabase.table("mining_workers").insert(filtered_workers_data).execute()
-        if hasattr(result, 'data'):
-            logger.info(f"Saved {len(workers_data)} workers to Supabase")
-            return True
-        return False
-    except Exception as e:
-        logger.error(f"Supabase save error: {str(e)}")
-        return False
-
-async def process_single_client(access_key, user_id, coin_type, output_dir, debug=False):
-    """Process a single client with proper error handling."""
-    logger.info(f"Starting worker scraping for {user_id} ({coin_type})...")
+    failed_workers = insert_in_batches(supabase, "mining_workers", filtered_workers_data)
     
-    # Create output directory if it doesn't exist
-    os.makedirs(output_dir, exist_ok=True)
+    success_count = len(workers_data) - len(failed_workers)
+    logger.info("===== Supabase Upload Summary =====")
+    logger.info(f"Total workers: {len(workers_data)}")
+    logger.info(f"Successfully uploaded: {success_count}")
+    logger.info(f"Failed: {len(failed_workers)}")
+    if workers_data:
+        logger.info(f"Success rate: {(success_count / len(workers_data)) * 100:.1f}%")
+    return failed_workers
+
+async def process_single_client(browser, access_key, user_id, coin_type, output_dir, timestamp_str, debug=False):
+    """Process a single client in its own context of the shared browser.
     
-    # Initialize timestamp for filenames
-    timestamp_str = datetime.now().strftime("%Y%m%d_%H%M")
+    output_dir must already exist; timestamp_str is the run timestamp shared by
+    every account's file names. Supabase writes are left to main, which saves
+    every account's workers in one batch.
+    """
+    logger.info(f"Starting worker scraping for {user_id} ({coin_type})...")
     
-    # Initialize browser
-    browser = None
-    page = None
+    context = None
     
     try:
-        logger.info("Launching browser...")
-        print("Launching browser...")
-        
-        # Initialize browser
-        browser = await setup_browser(headless=True)
-        print("Playwright started successfully")
-        print("Browser launched successfully")
-        
-        # Create a new page
-        page = await browser.new_page()
+        # Create an isolated context and page for this account
+        context = await browser.new_context(viewport={"width": 1920, "height": 1080})
+        await block_heavy_resources(context)
+        page = await context.new_page()
         page.set_default_timeout(15000)  # 15 second timeout
         
         # Scrape workers
@@ -395,7 +461,7 @@ async def process_single_client(access_key, user_id, coin_type, output_dir, debu
         
         # Save worker data to file
         output_file = os.path.join(output_dir, f"worker_stats_{user_id}_{timestamp_str}.json")
-        save_json_to_file(workers_data, output_file)
+        await asyncio.to_thread(save_json_to_file, workers_data, output_file)
         logger.info(f"Worker stats saved to: {output_file}")
         
         # If no workers were found, create a placeholder entry
@@ -422,62 +488,6 @@ async def process_single_client(access_key, user_id, coin_type, output_dir, debu
         logger.info(f"Active workers: {active_workers}")
         logger.info(f"Inactive workers: {inactive_workers}")
         
-        # Save to Supabase
-        supabase = get_supabase_client()
-        if supabase:
-            logger.info(f"===== Uploading {len(workers_data)} Workers to Supabase =====")
-            
-            # Use batch uploads for better performance
-            batch_size = 100
-            logger.info(f"Using batch size of {batch_size} workers per request")
-            
-            # Filter worker data to include only fields in the schema
-            filtered_workers_data = filter_schema_fields_list(workers_data, "mining_workers")
-            
-            # Split workers into batches
-            batches = [filtered_workers_data[i:i + batch_size] for i in range(0, len(filtered_workers_data), batch_size)]
-            
-            success_count = 0
-            for i, batch in enumerate(batches):
-                try:
-                    logger.info(f"Uploading batch {i+1}/{len(batches)} ({len(batch)} workers)")
-                    result = supabase.table("mining_workers").insert(batch).execute()
-                    if hasattr(result, 'data'):
-                        success_count += len(batch)
-                        logger.info(f"Batch {i+1}/{len(batches)} uploaded successfully")
-                    else:
-                        logger.error(f"❌ Error uploading batch {i+1}/{len(batches)}: {result}")
-                        # Fallback to individual inserts
-                        logger.info(f"Falling back to individual inserts for batch {i+1}")
-                        individual_success = 0
-                        for worker in batch:
-                            try:
-                                result = supabase.table("mining_workers").insert(worker).execute()
-                                if hasattr(result, 'data'):
-                                    success_count += 1
-                                    individual_success += 1
-                            except Exception as e:
-                                logger.error(f"❌ Error saving worker {worker.get('worker', 'unknown')}: {str(e)}")
-                        logger.info(f"Individual inserts: {individual_success}/{len(batch)} workers saved successfully")
-                except Exception as e:
-                    logger.error(f"❌ Error uploading batch {i+1}/{len(batches)}: {str(e)}")
-            
-            logger.info("===== Supabase Upload Summary =====")
-            logger.info(f"Total workers: {len(workers_data)}")
-            logger.info(f"Successfully uploaded: {success_count}")
-            logger.info(f"Failed: {len(workers_data) - success_count}")
-            logger.info(f"Success rate: {(success_count / len(workers_data)) * 100:.1f}%")
-            
-            # Update last_scraped_at for this account
-            try:
-                result = supabase.table("account_credentials").update({"last_scraped_at": datetime.now().isoformat()}).eq("user_id", user_id).execute()
-                if hasattr(result, 'data'):
-                    logger.info(f"✅ Updated last_scraped_at for {user_id}")
-            except Exception as e:
-                logger.error(f"❌ Error updating last_scraped_at for {user_id}: {str(e)}")
-        else:
-            logger.warning("Supabase client not available, skipping upload")
-        
         logger.info("===== Worker Scraping Completed Successfully =====")
         logger.info(f"Account: {user_id} ({coin_type})")
         logger.info(f"Total workers extracted: {len(workers_data)}")
@@ -489,7 +499,8 @@ async def process_single_client(access_key, user_id, coin_type, output_dir, debu
             "active_workers": active_workers,
             "inactive_workers": inactive_workers,
             "output_file": output_file,
-            "screenshot_path": screenshot_path
+            "screenshot_path": screenshot_path,
+            "workers_data": workers_data
         }
         
     except Exception as e:
@@ -501,12 +512,9 @@ async def process_single_client(access_key, user_id, coin_type, output_dir, debu
         }
     
     finally:
-        # Close browser
-        if page:
-            await page.close()
-        if browser:
-            await browser.close()
-            logger.info("Browser closed")
+        # Close this account's context
+        if context:
+            await context.close()
 
 async def main():
     """Main entry point for the script."""
@@ -519,7 +527,7 @@ async def main():
     
     # Fetch accounts from Supabase
     try:
-        response = supabase.table("account_credentials").select("*").eq("is_active", True).execute()
+        response = supabase.table("account_credentials").select(ACCOUNT_COLUMNS).eq("is_active", True).execute()
         accounts = response.data
         logger.info(f"Found {len(accounts)} active accounts")
     except Exception as e:
@@ -530,34 +538,73 @@ async def main():
     output_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output")
     os.makedirs(output_dir, exist_ok=True)
     
-    # Process each account
-    successful_accounts = 0
-    failed_accounts = 0
+    # One timestamp for every account's file names in this run
+    timestamp_str = datetime.now().strftime("%Y%m%d_%H%M")
+    
+    # Process accounts concurrently, at most SCRAPE_CONCURRENCY at a time
+    semaphore = asyncio.Semaphore(int(os.environ.get("SCRAPE_CONCURRENCY", 4)))
     
-    for account in accounts:
-        try:
+    async def run_account(browser, account):
+        async with semaphore:
             logger.info(f"Processing account: {account['user_id']} ({account['coin_type']})")
             result = await process_single_client(
+                browser,
                 account["access_key"],
                 account["user_id"],
                 account["coin_type"],
-                output_dir
+                output_dir,
+                timestamp_str
             )
             
             if result["success"]:
-                successful_accounts += 1
                 logger.info(f"✅ Successfully processed account: {account['user_id']}")
             else:
-                failed_accounts += 1
                 logger.error(f"Failed to scrape workers for {account['user_id']}")
             
-            # Wait 5 seconds between accounts to avoid rate limiting
-            await asyncio.sleep(5)
+            return result
+    
+    # Launch one browser for each batch of accounts (each account gets its own
+    # context) and relaunch it between batches so Chromium's memory is bounded.
+    # A browser daemon is never relaunched, so its accounts run as one batch
+    recycle_every = int(os.environ.get("BROWSER_RECYCLE_EVERY", 50)) or max(len(accounts), 1)
+    if uses_browser_daemon():
+        recycle_every = max(len(accounts), 1)
+    results = []
+    async with async_playwright() as playwright:
+        for start in range(0, len(accounts), recycle_every):
+            batch = accounts[start:start + recycle_every]
+            browser = await launch_browser(playwright)
             
-        except Exception as e:
-            failed_accounts += 1
-            logger.error(f"Error processing account {account['user_id']}: {str(e)}")
-            continue
+            try:
+                results.extend(await asyncio.gather(
+                    *(run_account(browser, account) for account in batch),
+                    return_exceptions=True
+                ))
+            finally:
+                await browser.close()
+                logger.info("Browser closed")
+    
+    for account, result in zip(accounts, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error processing account {account['user_id']}: {str(result)}")
+    
+    successful_results = [
+        (account, result) for account, result in zip(accounts, results)
+        if isinstance(result, dict) and result["success"]
+    ]
+    successful_accounts = len(successful_results)
+    failed_accounts = len(accounts) - successful_accounts
+    
+    # Save all accounts' workers to Supabase, then mark the accounts whose workers
+    # were all saved as scraped
+    all_workers = [worker for _, result in successful_results for worker in result["workers_data"]]
+    failed_workers = []
+    if all_workers:
+        failed_workers = await asyncio.to_thread(upload_workers_to_supabase, supabase, all_workers)
+    unsaved_user_ids = {worker.get("observer_user_id") for worker in failed_workers}
+    saved_user_ids = [account["user_id"] for account, _ in successful_results if account["user_id"] not in unsaved_user_ids]
+    if saved_user_ids:
+        await asyncio.to_thread(update_last_scraped, supabase, saved_user_ids)
     
     logger.info("===== Worker Scraper Summary =====")
     logger.info(f"Total accounts processed: {len(accounts)}")
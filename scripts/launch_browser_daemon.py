@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Antpool Browser Daemon
+
+This script launches a long-lived Chromium with remote debugging enabled so that
+scrapers can attach to it instead of starting a new browser on every run.
+
+Usage:
+    python3 launch_browser_daemon.py [--port=<port>] [--headful]
+
+Example:
+    python3 launch_browser_daemon.py --port=9222 &
+    PLAYWRIGHT_CDP_ENDPOINT=http://localhost:9222 python3 antpool_inactive_scraper_multi.py
+"""
+
+import argparse
+import asyncio
+
+from playwright.async_api import async_playwright
+
+async def run_daemon(port, headless):
+    """Launch Chromium with a CDP port and keep it running until interrupted."""
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(
+            headless=headless,
+            args=[
+                f"--remote-debugging-port={port}",
+                "--disable-features=site-per-process",
+                "--disable-web-security",
+                "--disable-gpu"
+            ],
+        )
+        print(f"Browser daemon running (Chromium {browser.version})")
+        print(f"PLAYWRIGHT_CDP_ENDPOINT=http://localhost:{port}")
+        
+        try:
+            # Block until the process is stopped
+            await asyncio.Event().wait()
+        finally:
+            await browser.close()
+            print("Browser daemon stopped")
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Antpool Browser Daemon")
+    parser.add_argument("--port", type=int, default=9222, help="Remote debugging port (default: 9222)")
+    parser.add_argument("--headful", action="store_true", help="Run the browser with a visible window")
+    
+    args = parser.parse_args()
+    
+    try:
+        asyncio.run(run_daemon(args.port, not args.headful))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,65 @@
 import os
+import re
+import json
+import time
 import asyncio
-from typing import Tuple, Optional, Dict, List
-from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright
+from typing import Tuple, Optional, Dict, List, Union
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright, Route
 
-async def setup_browser(playwright: Optional[Playwright] = None, headless: bool = True) -> Tuple[Browser, BrowserContext, Page]:
-    """Set up browser for scraping.
+# Resource types the scrapers never read; stylesheets are kept because the
+# Ant Design tabs and pagination rely on CSS visibility for clicks
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font", "texttrack", "manifest"})
+BLOCKED_URL_PATTERN = re.compile(r"google-analytics|googletagmanager|doubleclick|hotjar|facebook\.net|baidu\.com/hm")
+
+# Removes Ant Design modal overlays whenever they are added to the document. It
+# observes document itself because init scripts run before <html> exists.
+ANT_MODAL_OBSERVER_JS = """new MutationObserver(() => {
+    document.querySelectorAll('.ant-modal-mask, .ant-modal-wrap').forEach(el => el.remove());
+}).observe(document, {childList: true, subtree: true});"""
+
+# Closes and removes Ant Design modals, returning early when none are present
+CLEAR_ANT_MODALS_JS = """() => {
+    if (!document.querySelector('.ant-modal-close, .ant-modal-mask, .ant-modal-wrap')) return;
+    document.querySelectorAll('.ant-modal-close').forEach(el => el.click());
+    document.querySelectorAll('.ant-modal-mask, .ant-modal-wrap').forEach(el => el.remove());
+}"""
+
+# Consent cookies and localStorage entries saved once the consent dialogs are
+# accepted, reused by later contexts so they skip handle_cookie_consent; refreshed
+# once it is a week old. Kept in the user's cache directory rather than the output
+# directory, and limited to consent entries so no account's session is shared
+CONSENT_STATE_FILE = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "antpool_consent.json"
+)
+CONSENT_STATE_MAX_AGE = 7 * 24 * 60 * 60
+CONSENT_ENTRY_PATTERN = re.compile(r"consent|cookie|agree|gdpr|privacy", re.IGNORECASE)
+
+def uses_browser_daemon() -> bool:
+    """Check whether browsers come from a running daemon over PLAYWRIGHT_CDP_ENDPOINT.
+    
+    Closing a browser connected over CDP only disconnects from it, so callers
+    that relaunch the browser to free memory should skip that when this is True.
+    
+    Returns:
+        bool: True if PLAYWRIGHT_CDP_ENDPOINT is set
+    """
+    return bool(os.environ.get("PLAYWRIGHT_CDP_ENDPOINT"))
+
+async def launch_browser(playwright: Optional[Playwright] = None, headless: bool = True) -> Browser:
+    """Launch a browser, or connect to the running one, without opening a context.
+    
+    If the PLAYWRIGHT_CDP_ENDPOINT environment variable is set, connects to an
+    already running Chromium (see scripts/launch_browser_daemon.py) instead of
+    launching a new one. Multi-account scrapers use this and open one context per
+    account, so no idle default context is left open in the daemon.
     
     Args:
         playwright: Optional Playwright instance (if None, will create a new one)
         headless: Whether to run browser in headless mode (default: True)
     
     Returns:
-        Tuple of (Browser, BrowserContext, Page)
+        Browser: Launched or connected browser
     """
     print("\nLaunching browser...")
     try:
@@ -21,30 +69,81 @@ async def setup_browser(playwright: Optional[Playwright] = None, headless: bool
             local_playwright = await async_playwright().start()
             print("Playwright started successfully")
         
-        # Browser arguments from working script
-        browser_args = [
-            "--start-maximized",
-            "--disable-features=site-per-process",
-            "--disable-web-security",
-            "--disable-gpu"
-        ]
-        
-        browser = await local_playwright.chromium.launch(
-            headless=headless,
-            args=browser_args,
-            timeout=15000,  # 15 second timeout for browser launch (reduced from 60s)
-        )
-        print("Browser launched successfully")
-        
-        # Create context and page
-        context = await browser.new_context(viewport={"width": 1920, "height": 1080})
-        page = await context.new_page()
+        cdp_endpoint = os.environ.get("PLAYWRIGHT_CDP_ENDPOINT")
+        if cdp_endpoint:
+            browser = await local_playwright.chromium.connect_over_cdp(cdp_endpoint, timeout=15000)
+            print(f"Connected to running browser at {cdp_endpoint}")
+        else:
+            # Browser arguments from working script
+            browser_args = [
+                "--start-maximized",
+                "--disable-features=site-per-process",
+                "--disable-web-security",
+                "--disable-gpu",
+                "--disable-dev-shm-usage",
+                "--memory-pressure-off"
+            ]
+            
+            browser = await local_playwright.chromium.launch(
+                headless=headless,
+                args=browser_args,
+                timeout=15000,  # 15 second timeout for browser launch (reduced from 60s)
+            )
+            print("Browser launched successfully")
         
-        return browser, context, page
+        return browser
     except Exception as e:
         print(f"CRITICAL ERROR launching browser: {str(e)}")
         raise
 
+async def setup_browser(playwright: Optional[Playwright] = None, headless: bool = True) -> Tuple[Browser, BrowserContext, Page]:
+    """Set up browser for scraping, with a default context and page.
+    
+    See launch_browser for how the browser is obtained.
+    
+    Args:
+        playwright: Optional Playwright instance (if None, will create a new one)
+        headless: Whether to run browser in headless mode (default: True)
+    
+    Returns:
+        Tuple of (Browser, BrowserContext, Page)
+    """
+    browser = await launch_browser(playwright, headless)
+    
+    # Create context and page
+    context = await browser.new_context(viewport={"width": 1920, "height": 1080})
+    page = await context.new_page()
+    
+    return browser, context, page
+
+async def _abort_heavy_resources(route: Route) -> None:
+    """Abort images, fonts, media and analytics requests; continue everything else."""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or BLOCKED_URL_PATTERN.search(request.url):
+        await route.abort()
+    else:
+        await route.continue_()
+
+async def block_heavy_resources(target: Union[Page, BrowserContext]) -> None:
+    """Stop a page or context from downloading resources the scrapers don't use.
+    
+    Args:
+        target: Playwright page or browser context to register the route on
+    """
+    await target.route("**/*", _abort_heavy_resources)
+
+async def remove_ant_modals(target: Union[Page, BrowserContext]) -> None:
+    """Keep Ant Design modals and masks out of a page or context's documents.
+    
+    Registers an init script whose MutationObserver removes .ant-modal-mask and
+    .ant-modal-wrap elements as soon as they are inserted, so scrapers don't
+    need to scrub them before each click.
+    
+    Args:
+        target: Playwright page or browser context to register the script on
+    """
+    await target.add_init_script(ANT_MODAL_OBSERVER_JS)
+
 async def handle_informed_consent(page: Page) -> bool:
     """Handle the Antpool INFORMED CONSENT modal dialog using advanced techniques.
     
@@ -237,12 +336,73 @@ async def handle_cookie_consent(page: Page) -> bool:
 # Alias for backward compatibility
 handle_consent_dialog = handle_cookie_consent
 
-async def take_screenshot(page: Page, file_path: str) -> str:
+def consent_state_is_fresh(consent_path: str) -> bool:
+    """Check whether a saved consent state exists and is younger than CONSENT_STATE_MAX_AGE.
+    
+    Args:
+        consent_path: Path of the saved storage state
+        
+    Returns:
+        bool: True if the state can be reused
+    """
+    try:
+        return time.time() - os.path.getmtime(consent_path) < CONSENT_STATE_MAX_AGE
+    except OSError:
+        return False
+
+def _consent_only_state(state: Dict) -> Dict:
+    """Reduce a storage state to the cookies and localStorage entries named after consent."""
+    origins = []
+    for origin in state.get("origins", []):
+        entries = [entry for entry in origin.get("localStorage", []) if CONSENT_ENTRY_PATTERN.search(entry["name"])]
+        if entries:
+            origins.append({"origin": origin["origin"], "localStorage": entries})
+    return {
+        "cookies": [cookie for cookie in state.get("cookies", []) if CONSENT_ENTRY_PATTERN.search(cookie["name"])],
+        "origins": origins
+    }
+
+async def save_consent_state(context: BrowserContext, page: Page, consent_path: str) -> bool:
+    """Save the context's consent cookies and localStorage, once the consent dialog is gone.
+    
+    handle_cookie_consent reports success even when clicking fails, so the page
+    is checked directly to avoid reusing a state that never accepted consent.
+    Session cookies and other storage are dropped, and the file is readable only
+    by the current user. It is written to a temporary file and moved into place,
+    so a context never reads it half-written.
+    
+    Args:
+        context: Browser context whose state is saved
+        page: Page on which consent was handled
+        consent_path: Path to write the storage state to
+        
+    Returns:
+        bool: True if the state was saved
+    """
+    try:
+        if await page.locator('text="Got it"').first.is_visible():
+            print("ℹ️ Consent dialog still visible, not saving consent state")
+            return False
+        state = _consent_only_state(await context.storage_state())
+        os.makedirs(os.path.dirname(consent_path), exist_ok=True)
+        tmp_path = f"{consent_path}.{os.getpid()}.tmp"
+        with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, consent_path)
+        print(f"✅ Saved consent state to {consent_path}")
+        return True
+    except Exception as e:
+        print(f"❌ Error saving consent state: {str(e)}")
+        return False
+
+async def take_screenshot(page: Page, file_path: str, full_page: bool = True, quality: Optional[int] = None) -> str:
     """Take a screenshot of the page.
     
     Args:
         page: Playwright page
-        file_path: Path to save screenshot
+        file_path: Path to save screenshot (a .jpg extension produces a JPEG)
+        full_page: Whether to capture the full scrollable page (default: True)
+        quality: Optional JPEG quality (0-100), ignored for PNG
         
     Returns:
         Path to saved screenshot
@@ -252,7 +412,10 @@ async def take_screenshot(page: Page, file_path: str) -> str:
         os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
         
         # Take screenshot
-        await page.screenshot(path=file_path, full_page=True)
+        if quality is not None and file_path.lower().endswith((".jpg", ".jpeg")):
+            await page.screenshot(path=file_path, full_page=full_page, type="jpeg", quality=quality)
+        else:
+            await page.screenshot(path=file_path, full_page=full_page)
         print(f"📸 Screenshot saved to {file_path}")
         return file_path
     except Exception as e:
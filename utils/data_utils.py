@@ -1,8 +1,11 @@
 import os
-import json
+import gzip
 import datetime
+from pathlib import Path
 from typing import List, Dict, Any, Optional
 
+import orjson
+
 def save_json_to_file(data: Any, output_file: str) -> None:
     """Save data to JSON file.
     
@@ -14,14 +17,30 @@ def save_json_to_file(data: Any, output_file: str) -> None:
     os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
     
     # Save data to JSON file
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2)
+    Path(output_file).write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
     
     print(f"Data saved to: {output_file}")
 
 # Alias for backward compatibility
 save_json_data = save_json_to_file
 
+def save_ndjson_gz(records: List[Dict[str, Any]], output_file: str) -> None:
+    """Save records as gzip-compressed newline-delimited JSON.
+    
+    Args:
+        records: List of records to save, one JSON object per line
+        output_file: Path to output file (e.g. "inactive_workers_20240101_0000.ndjson.gz")
+    """
+    # Create directory if it doesn't exist
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+    
+    # Write all records in a single compressed stream
+    with gzip.open(output_file, 'wb') as f:
+        for record in records:
+            f.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
+    
+    print(f"Data saved to: {output_file}")
+
 def format_timestamp() -> str:
     """Format current timestamp to ISO format.
     
@@ -0,0 +1,24 @@
+import queue
+import logging
+from logging.handlers import QueueHandler, QueueListener
+
+def setup_logging(debug: bool = False) -> QueueListener:
+    """Route log records through a queue so stream writes happen on a listener thread.
+
+    Args:
+        debug: Whether to log at DEBUG level instead of INFO (default: False)
+
+    Returns:
+        QueueListener: Started listener; call stop() before exiting to flush pending records
+    """
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+
+    root_logger = logging.getLogger()
+    root_logger.handlers = [QueueHandler(log_queue)]
+    root_logger.setLevel(logging.DEBUG if debug else logging.INFO)
+
+    listener = QueueListener(log_queue, stream_handler)
+    listener.start()
+    return listener
@@ -1,16 +1,28 @@
 import os
 import sys
 import json
+import datetime
 from typing import List, Dict, Any, Optional
 
 from supabase import create_client, Client
 
+# Client shared by every caller; only set once creation succeeds
+_supabase_client: Optional[Client] = None
+
 def get_supabase_client() -> Optional[Client]:
     """Get a Supabase client instance.
     
+    The client is created once per process and reused by every caller,
+    including the save_* helpers below. A failed attempt is not cached, so
+    later calls retry.
+    
     Returns:
         Optional[Client]: Supabase client instance or None if credentials are missing
     """
+    global _supabase_client
+    if _supabase_client is not None:
+        return _supabase_client
+    
     try:
         # Get Supabase credentials from environment
         supabase_url = os.environ.get("SUPABASE_URL")
@@ -21,8 +33,9 @@ def get_supabase_client() -> Optional[Client]:
             return None
         
         # Initialize Supabase client
+        _supabase_client = create_client(supabase_url, supabase_key)
         print(f"Supabase client initialized with URL: {supabase_url}")
-        return create_client(supabase_url, supabase_key)
+        return _supabase_client
     
     except Exception as e:
         print(f"Error initializing Supabase client: {e}")
@@ -116,6 +129,58 @@ def filter_schema_fields_list(data_list: List[Dict[str, Any]], table_name: str)
     """
     return [filter_schema_fields(item, table_name) for item in data_list]
 
+def insert_in_batches(supabase: Client, table_name: str, rows: List[Dict[str, Any]], batch_size: int = 500) -> List[Dict[str, Any]]:
+    """Insert rows into a table in batches, retrying a failed batch row by row.
+    
+    A batch insert fails as a whole when any of its rows is rejected, so each row
+    of a failed batch is inserted on its own and only the bad rows are lost.
+    
+    Args:
+        supabase: Supabase client
+        table_name: Name of the table to insert into
+        rows: Rows to insert, already filtered to the table schema
+        batch_size: Maximum number of rows per insert request
+        
+    Returns:
+        List[Dict[str, Any]]: Rows that could not be saved
+    """
+    failed_rows = []
+    for i in range(0, len(rows), batch_size):
+        batch = rows[i:i + batch_size]
+        try:
+            supabase.table(table_name).insert(batch).execute()
+        except Exception as e:
+            print(f"Error inserting batch of {len(batch)} rows into {table_name}, retrying row by row: {e}")
+            for row in batch:
+                try:
+                    supabase.table(table_name).insert(row).execute()
+                except Exception as row_error:
+                    print(f"Error inserting row into {table_name}: {row_error}")
+                    failed_rows.append(row)
+    
+    print(f"Saved {len(rows) - len(failed_rows)}/{len(rows)} rows to {table_name}")
+    return failed_rows
+
+def update_last_scraped(supabase: Client, user_ids: List[str]) -> bool:
+    """Set last_scraped_at in account_credentials for all given users in one statement.
+    
+    Args:
+        supabase: Supabase client
+        user_ids: Observer user IDs of the accounts that were scraped
+        
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        supabase.table("account_credentials").update(
+            {"last_scraped_at": datetime.datetime.now().isoformat()}
+        ).in_("user_id", user_ids).execute()
+        print(f"Updated last_scraped_at for {len(user_ids)} accounts")
+        return True
+    except Exception as e:
+        print(f"Error updating last_scraped_at: {e}")
+        return False
+
 def save_pool_stats(pool_stats: Dict[str, Any]) -> bool:
     """Save pool statistics to Supabase.
     
@@ -126,17 +191,12 @@ def save_pool_stats(pool_stats: Dict[str, Any]) -> bool:
         bool: True if successful, False otherwise
     """
     try:
-        # Get Supabase credentials from environment
-        supabase_url = os.environ.get("SUPABASE_URL")
-        supabase_key = os.environ.get("SUPABASE_KEY")
+        # Get the shared Supabase client
+        supabase = get_supabase_client()
         
-        if not supabase_url or not supabase_key:
-            print("Supabase credentials not found in environment variables")
+        if not supabase:
             return False
         
-        # Initialize Supabase client
-        supabase = create_client(supabase_url, supabase_key)
-        
         # Filter pool stats to include only fields in the schema
         filtered_pool_stats = filter_schema_fields(pool_stats, "mining_pool_stats")
         
@@ -164,17 +224,12 @@ def save_worker_stats(worker_stats: List[Dict[str, Any]]) -> bool:
         bool: True if successful, False otherwise
     """
     try:
-        # Get Supabase credentials from environment
-        supabase_url = os.environ.get("SUPABASE_URL")
-        supabase_key = os.environ.get("SUPABASE_KEY")
+        # Get the shared Supabase client
+        supabase = get_supabase_client()
         
-        if not supabase_url or not supabase_key:
-            print("Supabase credentials not found in environment variables")
+        if not supabase:
             return False
         
-        # Initialize Supabase client
-        supabase = create_client(supabase_url, supabase_key)
-        
         # Filter worker stats to include only fields in the schema
         filtered_worker_stats = filter_schema_fields_list(worker_stats, "mining_workers")
         
@@ -202,17 +257,12 @@ def save_inactive_worker_stats(inactive_worker_stats: List[Dict[str, Any]]) -> b
         bool: True if successful, False otherwise
     """
     try:
-        # Get Supabase credentials from environment
-        supabase_url = os.environ.get("SUPABASE_URL")
-        supabase_key = os.environ.get("SUPABASE_KEY")
+        # Get the shared Supabase client
+        supabase = get_supabase_client()
         
-        if not supabase_url or not supabase_key:
-            print("Supabase credentials not found in environment variables")
+        if not supabase:
             return False
         
-        # Initialize Supabase client
-        supabase = create_client(supabase_url, supabase_key)
-        
         # Filter inactive worker stats to include only fields in the schema
         filtered_inactive_worker_stats = filter_schema_fields_list(inactive_worker_stats, "mining_inactive_workers")
         
@@ -240,17 +290,12 @@ def save_earnings_history(earnings_history: List[Dict[str, Any]]) -> bool:
         bool: True if successful, False otherwise
     """
     try:
-        # Get Supabase credentials from environment
-        supabase_url = os.environ.get("SUPABASE_URL")
-        supabase_key = os.environ.get("SUPABASE_KEY")
+        # Get the shared Supabase client
+        supabase = get_supabase_client()
         
-        if not supabase_url or not supabase_key:
-            print("Supabase credentials not found in environment variables")
+        if not supabase:
             return False
         
-        # Initialize Supabase client
-        supabase = create_client(supabase_url, supabase_key)
-        
         # Filter earnings history to include only fields in the schema
         filtered_earnings_history = filter_schema_fields_list(earnings_history, "mining_earnings")
         